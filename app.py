@@ -5,7 +5,12 @@ Flask web server for the LLM-Based Healthcare Feedback Gathering System.
 Provides RESTful API endpoints and serves the web interface.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import logging
+import logging.handlers
 import os
+import queue
 import sys
 import uuid
 
@@ -18,7 +23,7 @@ except Exception as e:
     pass
 
 try:
-    from flask import Flask, render_template, request, jsonify  # type: ignore
+    from flask import Flask, Response, render_template, request, jsonify, stream_with_context  # type: ignore
     from flask_cors import CORS  # type: ignore
 except ImportError as e:
     print("=" * 60)
@@ -31,18 +36,74 @@ except ImportError as e:
     print("=" * 60)
     sys.exit(1)
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    # orjson not installed - Flask's standard library JSON provider is used
+    orjson = None
+
 # Import unified modules
 from conversation import ConversationManager
 from prompts import get_system_prompt, get_user_message, CONVERSATIONAL_SYSTEM_PROMPT
 from llm_client import LLMClient
 from feedback_analyzer import FeedbackAnalyzer
-from storage import FeedbackStorage
+from storage import create_feedback_storage
+from llm_cache import SemanticCache, embed, namespace_for
+from session_store import create_session_store
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider  # type: ignore
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson for faster (de)serialization."""
+
+        def dumps(self, obj, **kwargs) -> str:
+            """Serialize obj to a JSON string, pretty-printed when an indent is requested."""
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if kwargs.get("indent"):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+        def loads(self, s, **kwargs):
+            """Deserialize a JSON string or bytes (used for request.json)."""
+            return orjson.loads(s)
+
+
+def _configure_logging() -> logging.handlers.QueueListener:
+    """
+    Route log records through a queue so handler I/O runs on a background thread.
+
+    Request threads only enqueue records; a QueueListener formats and writes
+    them to stderr, so an error storm never blocks request handling on stdout.
+
+    Returns:
+        The started QueueListener (stopped at interpreter exit)
+    """
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+_log_listener = _configure_logging()
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for API requests
 
 # Initialize global components
-storage = FeedbackStorage("feedback_data.csv")
+storage = create_feedback_storage(os.getenv("FEEDBACK_STORE", "feedback_data.csv"))
 analyzer = FeedbackAnalyzer()
 
 # Initialize LLM client
@@ -54,9 +115,31 @@ except Exception as e:
     print(f"Warning: {e}, using mock provider")
     llm_client = LLMClient(provider="mock")
 
+# Mock client used when the configured provider fails, built once at startup
+# so the error path doesn't pay construction cost during an outage
+_fallback_client = LLMClient(provider="mock")
+
+# Typed commands that end a conversation immediately
+_END_COMMANDS = frozenset({"end", "stop", "finish", "done"})
+
+# Semantic cache for conversational replies. Opt-in only: the hashed
+# embedding measures word overlap, not meaning. Entries are namespaced by the
+# system prompt and the assistant turn being answered, so a reply is only
+# reused at the same point in a conversation; the key embeds that assistant
+# turn plus the user turn, needs near-identical wording, and skips short
+# turns where a single word ("great" vs "terrible") flips the meaning
+semantic_cache = (
+    SemanticCache(maxsize=1024, threshold=0.98, ttl=3600)
+    if os.getenv("CHAT_SEMANTIC_CACHE", "0") == "1" else None
+)
+CHAT_CACHE_MIN_WORDS = 12
+
+# Background pool for work that doesn't need to delay the HTTP response
+_background = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vitalsense-bg")
+
 # Store active conversation sessions
-# Dictionary mapping session_id -> ConversationManager instance
-active_sessions = {}
+# Maps session_id -> ConversationManager (in-process, or Redis when REDIS_URL is set)
+active_sessions = create_session_store()
 
 
 @app.route('/')
@@ -83,7 +166,7 @@ def start_conversational_session():
         conversation.add_assistant_message(greeting)
         
         # Store session
-        active_sessions[session_id] = conversation
+        active_sessions.set(session_id, conversation)
         
         return jsonify({
             "success": True,
@@ -109,40 +192,33 @@ def send_message():
         if not user_message:
             return jsonify({"success": False, "error": "Message cannot be empty"}), 400
         
-        if not session_id or session_id not in active_sessions:
+        conversation = active_sessions.get(session_id)
+        if conversation is None:
             return jsonify({"success": False, "error": "Invalid or expired session"}), 400
         
-        conversation = active_sessions[session_id]
-        
         # Check explicit end command
-        if user_message.lower() in ["end", "stop", "finish", "done"]:
+        if user_message.lower() in _END_COMMANDS:
              return end_conversational_session_internal(session_id)
 
         # Add user message
-        conversation.add_user_message(user_message)
+        with active_sessions.lock(session_id):
+            conversation.add_user_message(user_message)
+            history = conversation.get_history()
+        cache_key = _chat_cache_key(history)
         
-        # Generate response using LLM Client
+        # Generate response using LLM Client (skipped on a semantic cache hit)
         try:
-            assistant_response = llm_client.chat(
-                conversation.get_history(),
-                CONVERSATIONAL_SYSTEM_PROMPT
-            )
+            assistant_response = _chat_cache_lookup(cache_key)
+            if assistant_response is None:
+                assistant_response = llm_client.chat(history, CONVERSATIONAL_SYSTEM_PROMPT)
+                _chat_cache_store(cache_key, assistant_response)
         except Exception as llm_error:
-            print(f"LLM Error: {llm_error}")
-            print("Falling back to mock provider for this response.")
-            try:
-                # Fallback to mock
-                fallback_client = LLMClient(provider="mock")
-                assistant_response = fallback_client.chat(
-                    conversation.get_history(),
-                    CONVERSATIONAL_SYSTEM_PROMPT
-                )
-                assistant_response += " [Note: System fallback engaged due to connection error]"
-            except Exception as e:
-                 assistant_response = f"System Error: {str(llm_error)}. Please check server logs."
+            assistant_response = _fallback_response(history, llm_error)
 
         # Add assistant response
-        conversation.add_assistant_message(assistant_response)
+        with active_sessions.lock(session_id):
+            conversation.add_assistant_message(assistant_response)
+            active_sessions.save(session_id, conversation)
         
         return jsonify({
             "success": True,
@@ -155,6 +231,119 @@ def send_message():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/conversation/stream', methods=['POST'])
+def stream_message():
+    """Send a user message and stream the assistant response as server-sent events."""
+    try:
+        data = request.json
+        user_message = data.get('message', '').strip()
+        session_id = data.get('session_id')
+        
+        if not user_message:
+            return jsonify({"success": False, "error": "Message cannot be empty"}), 400
+        
+        conversation = active_sessions.get(session_id)
+        if conversation is None:
+            return jsonify({"success": False, "error": "Invalid or expired session"}), 400
+        
+        # Explicit end commands get a regular JSON response
+        if user_message.lower() in _END_COMMANDS:
+            return end_conversational_session_internal(session_id)
+        
+        with active_sessions.lock(session_id):
+            conversation.add_user_message(user_message)
+            history = conversation.get_history()
+        cache_key = _chat_cache_key(history)
+        cached_response = _chat_cache_lookup(cache_key)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    
+    def generate():
+        parts = []
+        if cached_response is not None:
+            parts.append(cached_response)
+            yield _sse_event({"token": cached_response})
+        else:
+            try:
+                for token in llm_client.stream_chat(history, CONVERSATIONAL_SYSTEM_PROMPT):
+                    parts.append(token)
+                    yield _sse_event({"token": token})
+                _chat_cache_store(cache_key, "".join(parts))
+            except Exception as llm_error:
+                # Keep a partially streamed reply; otherwise stream the fallback
+                if not parts:
+                    fallback = _fallback_response(history, llm_error)
+                    parts.append(fallback)
+                    yield _sse_event({"token": fallback})
+        
+        assistant_response = "".join(parts)
+        with active_sessions.lock(session_id):
+            conversation.add_assistant_message(assistant_response)
+            active_sessions.save(session_id, conversation)
+        
+        yield _sse_event({
+            "done": True,
+            "success": True,
+            "message": assistant_response,
+            "is_active": True,
+            "session_id": session_id
+        })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _chat_cache_key(history):
+    """
+    Build the chat cache key for the latest user turn.
+    
+    Returns:
+        (namespace, embedding) of the preceding assistant turn plus the user
+        turn, or None if caching is off or the user turn is too short
+    """
+    if semantic_cache is None or not history or history[-1]["role"] != "user":
+        return None
+    user_message = history[-1]["content"]
+    if len(user_message.split()) < CHAT_CACHE_MIN_WORDS:
+        return None
+    
+    previous = history[-2]["content"] if len(history) > 1 and history[-2]["role"] == "assistant" else ""
+    namespace = namespace_for(CONVERSATIONAL_SYSTEM_PROMPT, previous)
+    return namespace, embed(f"{previous}\n{user_message}")
+
+
+def _chat_cache_lookup(cache_key):
+    """Get a cached reply for the user turn, if the chat cache has one."""
+    if cache_key is None:
+        return None
+    return semantic_cache.lookup(*cache_key)
+
+
+def _chat_cache_store(cache_key, response):
+    """Cache a reply in the background, if the turn is cacheable."""
+    if cache_key is not None:
+        _background.submit(semantic_cache.store, *cache_key, response)
+
+
+def _fallback_response(history, llm_error):
+    """Generate a reply with the mock provider after an LLM error."""
+    logger.warning("LLM error, falling back to mock provider for this response: %s", llm_error)
+    try:
+        # Fallback to mock
+        assistant_response = _fallback_client.chat(history, CONVERSATIONAL_SYSTEM_PROMPT)
+        return assistant_response + " [Note: System fallback engaged due to connection error]"
+    except Exception as e:
+        return f"System Error: {str(llm_error)}. Please check server logs."
+
+
+def _sse_event(payload):
+    """Format a payload as a server-sent event."""
+    return f"data: {app.json.dumps(payload)}\n\n"
+
+
 @app.route('/api/conversation/end', methods=['POST'])
 def end_conversational_session():
     """End the conversational session manually."""
@@ -168,13 +357,14 @@ def end_conversational_session():
 
 def end_conversational_session_internal(session_id):
     """Internal helper to end session and prepare for analysis."""
-    if not session_id or session_id not in active_sessions:
+    conversation = active_sessions.get(session_id)
+    if conversation is None:
         return jsonify({"success": False, "error": "Invalid session"}), 400
     
-    conversation = active_sessions[session_id]
-    
     closing_msg = "Thank you for your feedback. We are now analyzing your response."
-    conversation.add_assistant_message(closing_msg)
+    with active_sessions.lock(session_id):
+        conversation.add_assistant_message(closing_msg)
+        active_sessions.save(session_id, conversation)
     
     transcript = conversation.get_conversation_transcript()
     
@@ -201,8 +391,10 @@ def analyze_conversational_feedback():
         session_id = data.get('session_id')
         
         # Fallback to session memory if transcript missing
-        if not transcript and session_id and session_id in active_sessions:
-            transcript = active_sessions[session_id].get_conversation_transcript()
+        if not transcript:
+            conversation = active_sessions.get(session_id)
+            if conversation is not None:
+                transcript = conversation.get_conversation_transcript()
         
         if not transcript:
             return jsonify({"success": False, "error": "No transcript provided"}), 400
@@ -218,8 +410,7 @@ def analyze_conversational_feedback():
         storage.save_feedback(feedback)
         
         # Cleanup session
-        if session_id in active_sessions:
-            del active_sessions[session_id]
+        active_sessions.delete(session_id)
         
         return jsonify({
             "success": True,
@@ -233,9 +424,9 @@ def analyze_conversational_feedback():
 
 @app.route('/api/feedback-history', methods=['GET'])
 def get_feedback_history():
-    """Get all stored feedback entries."""
+    """Get stored feedback entries (optionally only the most recent ?limit=N)."""
     try:
-        feedback_list = storage.load_all_feedback()
+        feedback_list = storage.load_all_feedback(limit=request.args.get("limit", type=int))
         return jsonify({
             "success": True,
             "feedback": feedback_list
@@ -244,11 +435,23 @@ def get_feedback_history():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get semantic response cache hit/miss statistics."""
+    return jsonify({
+        "success": True,
+        "enabled": semantic_cache is not None and semantic_cache.enabled,
+        "size": len(semantic_cache) if semantic_cache is not None else 0,
+        "stats": dict(semantic_cache.stats) if semantic_cache is not None else {"hits": 0, "misses": 0}
+    })
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("HEALTHCARE FEEDBACK SERVER starting...")
     print(f"Provider: {provider}")
     print("http://localhost:5000")
+    print("(development server - use 'gunicorn app:app' in production)")
     print("=" * 60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=os.getenv("FLASK_DEBUG", "0") == "1", host='0.0.0.0', port=5000)
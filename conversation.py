@@ -5,9 +5,52 @@ Manages healthcare-related feedback conversation state.
 Maintains a buffer of messages for context, analysis, and session tracking.
 """
 
-from typing import List, Dict, Optional
+import logging
+import time
+from collections import deque
+from typing import Deque, List, Dict, Optional
 from datetime import datetime
 
+from prompts import SUMMARIZER_PROMPT
+
+try:
+    import tiktoken  # type: ignore
+except ImportError:
+    # tiktoken not installed - token counts are estimated from text length
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# tiktoken encoding, loaded on first use (False if unavailable)
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the LLM tokens in a piece of text.
+    
+    Uses tiktoken's cl100k_base encoding when available, otherwise
+    estimates roughly four characters per token.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Number of tokens
+    """
+    global _encoding
+    if _encoding is None:
+        _encoding = False
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # Encoding files unavailable (e.g. offline) - estimate instead
+                pass
+    if _encoding:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
 
 class ConversationManager:
     """
@@ -30,12 +73,47 @@ class ConversationManager:
         Args:
             session_id: Optional unique session identifier
         """
-        self.messages: List[Dict[str, str]] = []
+        # Bounded buffer: the oldest message is evicted automatically at capacity
+        self.messages: Deque[Dict[str, str]] = deque(maxlen=self.MAX_HISTORY_LENGTH)
+        # Messages ever appended (never decremented by evictions), so callers can
+        # tell which messages arrived after a given point
+        self.appended_count = 0
+        self._user_count = 0
+        self._assistant_count = 0
+        # Pre-formatted transcript lines, joined lazily and cached until the next append
+        self._transcript_parts: Deque[str] = deque()
+        self._transcript_cache: Optional[str] = None
+        # User/assistant messages pre-built in LLM format, kept in step with evictions
+        self._llm_history: Deque[Dict[str, str]] = deque()
+        # Rolling summary of turns compacted out of the LLM history, and how
+        # many of those turns are still held in the messages buffer
+        self.summary: Optional[str] = None
+        self._summarized = 0
         self.session_id = session_id
         self.created_at = datetime.now()
-        self.last_activity = datetime.now()
+        # Monotonic clock readings, only used to measure durations
+        self._started = time.monotonic()
+        self.last_activity = self._started
         self.is_active = True
-    
+
+    @classmethod
+    def from_messages(cls, messages: List[Dict[str, str]],
+                      session_id: Optional[str] = None) -> "ConversationManager":
+        """
+        Rebuild a conversation manager from stored message dictionaries.
+
+        Args:
+            messages: Raw message dictionaries, as stored in the messages buffer
+            session_id: Optional unique session identifier
+
+        Returns:
+            ConversationManager containing the given messages
+        """
+        conversation = cls(session_id=session_id)
+        for message in messages:
+            conversation._append(message)
+        return conversation
+
     def add_user_message(self, content: str) -> None:
         """
         Add a user message to the history.
@@ -46,13 +124,12 @@ class ConversationManager:
         if not content or not content.strip():
             return
             
-        self.messages.append({
+        self._append({
             "role": "user",
             "content": content.strip(),
-            "timestamp": datetime.now().isoformat()
+            "ts": time.time()
         })
-        self.last_activity = datetime.now()
-        self._enforce_max_length()
+        self.last_activity = time.monotonic()
     
     def add_assistant_message(self, content: str) -> None:
         """
@@ -64,13 +141,12 @@ class ConversationManager:
         if not content or not content.strip():
             return
             
-        self.messages.append({
+        self._append({
             "role": "assistant",
             "content": content.strip(),
-            "timestamp": datetime.now().isoformat()
+            "ts": time.time()
         })
-        self.last_activity = datetime.now()
-        self._enforce_max_length()
+        self.last_activity = time.monotonic()
     
     def add_system_message(self, content: str) -> None:
         """
@@ -79,10 +155,10 @@ class ConversationManager:
         Args:
             content: The system message content
         """
-        self.messages.append({
+        self._append({
             "role": "system",
             "content": content.strip(),
-            "timestamp": datetime.now().isoformat()
+            "ts": time.time()
         })
         
     def get_history(self) -> List[Dict[str, str]]:
@@ -93,20 +169,95 @@ class ConversationManager:
         Returns:
             List of message dictionaries [{'role': ..., 'content': ...}]
         """
-        return [
-            {"role": msg["role"], "content": msg["content"]}
-            for msg in self.messages
-            if msg["role"] in ("user", "assistant")
-        ]
+        return list(self._llm_history)
+    
+    def get_system_prompt(self, base_prompt: str) -> str:
+        """
+        Get the system prompt to send with get_history().
+        
+        Once older turns have been compacted, their summary is appended so
+        the LLM keeps that context.
+        
+        Args:
+            base_prompt: The conversational system prompt
+            
+        Returns:
+            System prompt, including the rolling summary if there is one
+        """
+        if not self.summary:
+            return base_prompt
+        return f"{base_prompt}\n\nPrior conversation summary: {self.summary}"
+    
+    def compact(self, llm_client, keep_last: int = 6, max_tokens: int = 2000) -> bool:
+        """
+        Replace older turns in the LLM history with a rolling summary.
+        
+        Only the LLM context view (get_history() / get_system_prompt()) is
+        condensed; the messages buffer and transcript keep every turn for
+        analysis. The mock provider can't summarize (it returns canned
+        replies), so nothing is compacted with it.
+        
+        Args:
+            llm_client: LLMClient used to write the summary
+            keep_last: Number of most recent messages kept verbatim
+            max_tokens: Compact only when the history exceeds this many tokens
+            
+        Returns:
+            True if the history was compacted
+        """
+        if len(self._llm_history) <= keep_last or llm_client.provider_name == "mock":
+            return False
+        
+        # Tokens are only counted here, so appends (and sessions rebuilt with
+        # from_messages) never pay for tokenization
+        tokens = 0
+        for msg in self._llm_history:
+            tokens += count_tokens(msg["content"])
+            if tokens > max_tokens:
+                break
+        else:
+            return False
+        
+        older = list(self._llm_history)[:len(self._llm_history) - keep_last]
+        lines = [f"Earlier summary: {self.summary}"] if self.summary else []
+        lines.extend(
+            f"{'Patient' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+            for msg in older
+        )
+        
+        try:
+            summary = llm_client.chat(
+                [{"role": "user", "content": "Summarize:\n" + "\n".join(lines)}],
+                SUMMARIZER_PROMPT
+            )
+        except Exception as e:
+            logger.warning("Could not summarize conversation history: %s", e)
+            return False
+        if not summary or not summary.strip():
+            return False
+        
+        for _ in older:
+            self._llm_history.popleft()
+        self._summarized += len(older)
+        self.summary = summary.strip()
+        return True
     
     def get_full_history(self) -> List[Dict[str, str]]:
         """
         Get complete message history including timestamps and system messages.
+        Timestamps are stored as epoch seconds and converted to ISO format here.
         
         Returns:
-            Full list of all message dictionaries
+            Full list of message dictionaries with 'role', 'content' and 'timestamp'
         """
-        return self.messages.copy()
+        return [
+            {
+                "role": msg["role"],
+                "content": msg["content"],
+                "timestamp": datetime.fromtimestamp(msg["ts"]).isoformat()
+            }
+            for msg in self.messages
+        ]
     
     def get_conversation_transcript(self) -> str:
         """
@@ -116,17 +267,9 @@ class ConversationManager:
         Returns:
             Full conversation transcript with labeled speakers
         """
-        if not self.messages:
-            return ""
-            
-        transcript_lines = []
-        for msg in self.messages:
-            if msg["role"] == "system":
-                continue  # Skip system messages in transcript
-            role_name = "Patient" if msg["role"] == "user" else "Assistant"
-            transcript_lines.append(f"{role_name}: {msg['content']}")
-            
-        return "\n".join(transcript_lines)
+        if self._transcript_cache is None:
+            self._transcript_cache = "\n".join(self._transcript_parts)
+        return self._transcript_cache
     
     def get_last_message(self, role: Optional[str] = None) -> Optional[Dict[str, str]]:
         """
@@ -156,13 +299,10 @@ class ConversationManager:
         Returns:
             Dictionary with counts: {'user': n, 'assistant': m, 'total': n+m}
         """
-        user_count = sum(1 for m in self.messages if m["role"] == "user")
-        assistant_count = sum(1 for m in self.messages if m["role"] == "assistant")
-        
         return {
-            "user": user_count,
-            "assistant": assistant_count,
-            "total": user_count + assistant_count
+            "user": self._user_count,
+            "assistant": self._assistant_count,
+            "total": self._user_count + self._assistant_count
         }
     
     def get_session_duration(self) -> float:
@@ -172,29 +312,61 @@ class ConversationManager:
         Returns:
             Duration in seconds since session started
         """
-        return (self.last_activity - self.created_at).total_seconds()
+        return self.last_activity - self._started
     
     def is_empty(self) -> bool:
         """Check if conversation has no messages."""
         return len(self.messages) == 0
     
-    def _enforce_max_length(self) -> None:
-        """Trim old messages if history exceeds maximum length."""
-        if len(self.messages) > self.MAX_HISTORY_LENGTH:
-            # Keep most recent messages, remove oldest
-            excess = len(self.messages) - self.MAX_HISTORY_LENGTH
-            self.messages = self.messages[excess:]
+    def _append(self, message: Dict[str, str]) -> None:
+        """Append a message, keeping counts and transcript in sync with evictions."""
+        if len(self.messages) == self.messages.maxlen:
+            evicted = self.messages[0]
+            self._count_message(evicted, -1)
+            if evicted["role"] != "system":
+                self._transcript_parts.popleft()
+                self._transcript_cache = None
+                if self._summarized:
+                    # Already compacted out of the LLM history
+                    self._summarized -= 1
+                else:
+                    self._llm_history.popleft()
+        
+        self.messages.append(message)
+        self.appended_count += 1
+        self._count_message(message, 1)
+        
+        if message["role"] != "system":  # Skip system messages in transcript
+            role_name = "Patient" if message["role"] == "user" else "Assistant"
+            self._transcript_parts.append(f"{role_name}: {message['content']}")
+            self._transcript_cache = None
+            self._llm_history.append({"role": message["role"], "content": message["content"]})
+    
+    def _count_message(self, message: Dict[str, str], delta: int) -> None:
+        """Adjust the running per-role message counts."""
+        if message["role"] == "user":
+            self._user_count += delta
+        elif message["role"] == "assistant":
+            self._assistant_count += delta
     
     def end_session(self) -> None:
         """Mark the session as ended."""
         self.is_active = False
-        self.last_activity = datetime.now()
+        self.last_activity = time.monotonic()
     
     def reset(self) -> None:
         """Reset the conversation manager for a new session."""
-        self.messages = []
+        self.messages.clear()
+        self._user_count = 0
+        self._assistant_count = 0
+        self._transcript_parts.clear()
+        self._transcript_cache = None
+        self._llm_history.clear()
+        self.summary = None
+        self._summarized = 0
         self.created_at = datetime.now()
-        self.last_activity = datetime.now()
+        self._started = time.monotonic()
+        self.last_activity = self._started
         self.is_active = True
     
     def __len__(self) -> int:
@@ -5,11 +5,55 @@ Manages natural, two-way conversational interactions with patients.
 Handles the assistant's persona, conversation flow, and state management.
 """
 
+import re
 from typing import List, Dict, Optional, Tuple
 from enum import Enum
 from datetime import datetime
 
 
+# Keywords used to track which topics a patient has mentioned
+TOPIC_KEYWORDS = {
+    "wait_time": ["wait", "waiting", "long time", "hours", "delay"],
+    "staff": ["staff", "nurse", "doctor", "receptionist", "employee"],
+    "facility": ["room", "building", "facility", "parking", "clean"],
+    "communication": ["explain", "told", "said", "understand", "confused"],
+    "treatment": ["treatment", "procedure", "medicine", "prescription"],
+    "billing": ["cost", "bill", "insurance", "payment", "expensive"],
+    "appointment": ["appointment", "schedule", "booking", "available"],
+    "overall_positive": ["good", "great", "excellent", "happy", "satisfied"],
+    "overall_negative": ["bad", "poor", "terrible", "unhappy", "disappointed"]
+}
+
+# Topics are tracked as bits of an int: topic i is discussed if bit i is set
+TOPIC_INDEX = {topic: i for i, topic in enumerate(TOPIC_KEYWORDS)}
+_TOPIC_NAMES = tuple(TOPIC_KEYWORDS)
+
+_KEYWORD_TOPICS = {kw: topic for topic, kws in TOPIC_KEYWORDS.items() for kw in kws}
+_KEYWORD_BITS = {kw: 1 << TOPIC_INDEX[topic] for kw, topic in _KEYWORD_TOPICS.items()}
+
+# Single pass over the message: the lookahead reports a keyword starting at
+# every position, so overlapping keywords ("unhappy"/"happy") all match
+_TOPIC_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(kw) for kw in sorted(_KEYWORD_TOPICS, key=len, reverse=True)) + "))"
+)
+
+# Phrases indicating the patient has finished sharing
+END_PHRASES = ("that's all", "nothing else", "i'm done", "that's it", "no more")
+
+_END_PHRASE_PATTERN = re.compile("|".join(re.escape(phrase) for phrase in END_PHRASES))
+
+# Follow-up questions for important topics, in the order they are suggested
+_FOLLOWUP_PROMPTS = tuple(
+    (1 << TOPIC_INDEX[topic], prompt)
+    for topic, prompt in (
+        ("wait_time", "I haven't heard about wait times - was there any waiting involved?"),
+        ("staff", "How was your interaction with the staff?"),
+        ("facility", "What did you think of the facilities?"),
+        ("treatment", "Can you tell me about the care or treatment you received?")
+    )
+)
+
+
 class ConversationState(Enum):
     """Enum representing the current state of the conversation."""
     IDLE = "idle"
@@ -29,6 +73,7 @@ class ConversationalAssistant:
         state: Current conversation state
         conversation_history: List of all messages exchanged
         topics_discussed: Set of topics mentioned during conversation
+            (backed by the topics_discussed_bits bitmask)
     """
     
     # System prompt defining the assistant's persona and behavior
@@ -98,12 +143,12 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
 
     def __init__(self):
         """Initialize the conversational assistant."""
-        self.conversation_history: List[Dict[str, str]] = []
         self.state = ConversationState.IDLE
-        self.topics_discussed: set = set()
+        self.topics_discussed_bits = 0
         self.created_at: Optional[datetime] = None
         self.ended_at: Optional[datetime] = None
         self._greeting_index = 0
+        self._reset_history()
     
     def start_conversation(self) -> str:
         """
@@ -112,9 +157,9 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         Returns:
             The greeting message to display to the user
         """
-        self.conversation_history = []
+        self._reset_history()
         self.state = ConversationState.ACTIVE
-        self.topics_discussed = set()
+        self.topics_discussed_bits = 0
         self.created_at = datetime.now()
         self.ended_at = None
         
@@ -122,11 +167,7 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         greeting = self.GREETINGS[self._greeting_index % len(self.GREETINGS)]
         self._greeting_index += 1
         
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": greeting,
-            "timestamp": datetime.now().isoformat()
-        })
+        self._append_message("assistant", greeting)
         
         return greeting
     
@@ -147,7 +188,7 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         self.ended_at = datetime.now()
         
         # Select closing message based on conversation length
-        msg_count = len([m for m in self.conversation_history if m["role"] == "user"])
+        msg_count = self._user_message_count
         if msg_count >= 5:
             closing = self.CLOSING_MESSAGES[0]  # Longer conversation - full thanks
         elif msg_count >= 2:
@@ -155,11 +196,7 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         else:
             closing = self.CLOSING_MESSAGES[2]  # Short conversation
         
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": closing,
-            "timestamp": datetime.now().isoformat()
-        })
+        self._append_message("assistant", closing)
         
         return closing
     
@@ -181,11 +218,7 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         
         cleaned_message = message.strip()
         
-        self.conversation_history.append({
-            "role": "user",
-            "content": cleaned_message,
-            "timestamp": datetime.now().isoformat()
-        })
+        self._append_message("user", cleaned_message)
         
         # Track topics mentioned (simple keyword detection)
         self._detect_topics(cleaned_message)
@@ -208,13 +241,41 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         if not message or not message.strip():
             return False
         
+        self._append_message("assistant", message.strip())
+        
+        return True
+    
+    def _append_message(self, role: str, content: str) -> None:
+        """Append a message to the history and update running counts."""
         self.conversation_history.append({
-            "role": "assistant",
-            "content": message.strip(),
+            "role": role,
+            "content": content,
+            # Public history keeps its ISO 'timestamp' field for existing readers
             "timestamp": datetime.now().isoformat()
         })
         
-        return True
+        if role == "user":
+            self._user_message_count += 1
+            self._last_user_message = content
+        elif role == "assistant":
+            self._assistant_message_count += 1
+        
+        role_label = "Assistant" if role == "assistant" else "Patient"
+        self._context_parts.append(f"{role_label}: {content}")
+        self._context_cache = None
+        self._messages.append({"role": role, "content": content})
+    
+    def _reset_history(self) -> None:
+        """Clear the message history and its running counts and context."""
+        self.conversation_history: List[Dict[str, str]] = []
+        self._user_message_count = 0
+        self._assistant_message_count = 0
+        self._last_user_message: Optional[str] = None
+        # Pre-formatted context lines, joined lazily and cached until the next append
+        self._context_parts: List[str] = []
+        self._context_cache: Optional[str] = None
+        # The same messages pre-built in LLM format, so providers get structured turns
+        self._messages: List[Dict[str, str]] = []
     
     def _detect_topics(self, message: str) -> None:
         """
@@ -223,23 +284,21 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         Args:
             message: The message to analyze
         """
-        message_lower = message.lower()
-        
-        topic_keywords = {
-            "wait_time": ["wait", "waiting", "long time", "hours", "delay"],
-            "staff": ["staff", "nurse", "doctor", "receptionist", "employee"],
-            "facility": ["room", "building", "facility", "parking", "clean"],
-            "communication": ["explain", "told", "said", "understand", "confused"],
-            "treatment": ["treatment", "procedure", "medicine", "prescription"],
-            "billing": ["cost", "bill", "insurance", "payment", "expensive"],
-            "appointment": ["appointment", "schedule", "booking", "available"],
-            "overall_positive": ["good", "great", "excellent", "happy", "satisfied"],
-            "overall_negative": ["bad", "poor", "terrible", "unhappy", "disappointed"]
-        }
-        
-        for topic, keywords in topic_keywords.items():
-            if any(kw in message_lower for kw in keywords):
-                self.topics_discussed.add(topic)
+        bits = self.topics_discussed_bits
+        for match in _TOPIC_PATTERN.finditer(message.lower()):
+            bits |= _KEYWORD_BITS[match.group(1)]
+        self.topics_discussed_bits = bits
+    
+    @property
+    def topics_discussed(self) -> set:
+        """Set of topic names mentioned during the conversation."""
+        topics = set()
+        bits = self.topics_discussed_bits
+        while bits:
+            lowest = bits & -bits
+            topics.add(_TOPIC_NAMES[lowest.bit_length() - 1])
+            bits ^= lowest
+        return topics
     
     def get_conversation_context(self) -> str:
         """
@@ -248,11 +307,21 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         Returns:
             Formatted conversation string with role labels
         """
-        formatted = []
-        for msg in self.conversation_history:
-            role_label = "Assistant" if msg["role"] == "assistant" else "Patient"
-            formatted.append(f"{role_label}: {msg['content']}")
-        return "\n\n".join(formatted)
+        if self._context_cache is None:
+            self._context_cache = "\n\n".join(self._context_parts)
+        return self._context_cache
+    
+    def get_messages(self) -> List[Dict[str, str]]:
+        """
+        Get the conversation as chat messages, ready to send to an LLM provider.
+        
+        The messages are built once as they are added, so this costs a
+        list copy rather than reformatting the whole history each turn.
+        
+        Returns:
+            List of message dicts with 'role' and 'content' keys only
+        """
+        return list(self._messages)
     
     def get_history_for_llm(self) -> List[Dict[str, str]]:
         """
@@ -261,10 +330,7 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         Returns:
             List of message dicts with 'role' and 'content' keys only
         """
-        return [
-            {"role": msg["role"], "content": msg["content"]}
-            for msg in self.conversation_history
-        ]
+        return self.get_messages()
     
     def get_conversation_summary(self) -> Dict:
         """
@@ -273,9 +339,6 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         Returns:
             Dictionary containing conversation metadata and statistics
         """
-        user_messages = [m for m in self.conversation_history if m["role"] == "user"]
-        assistant_messages = [m for m in self.conversation_history if m["role"] == "assistant"]
-        
         duration = None
         if self.created_at:
             end_time = self.ended_at or datetime.now()
@@ -284,8 +347,8 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         return {
             "state": self.state.value,
             "message_count": len(self.conversation_history),
-            "user_message_count": len(user_messages),
-            "assistant_message_count": len(assistant_messages),
+            "user_message_count": self._user_message_count,
+            "assistant_message_count": self._assistant_message_count,
             "topics_discussed": list(self.topics_discussed),
             "duration_seconds": duration,
             "created_at": self.created_at.isoformat() if self.created_at else None,
@@ -308,15 +371,8 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         Returns:
             A follow-up question string, or None if nothing to suggest
         """
-        unexplored_prompts = {
-            "wait_time": "I haven't heard about wait times - was there any waiting involved?",
-            "staff": "How was your interaction with the staff?",
-            "facility": "What did you think of the facilities?",
-            "treatment": "Can you tell me about the care or treatment you received?"
-        }
-        
-        for topic, prompt in unexplored_prompts.items():
-            if topic not in self.topics_discussed:
+        for bit, prompt in _FOLLOWUP_PROMPTS:
+            if not self.topics_discussed_bits & bit:
                 return prompt
         
         return None
@@ -328,26 +384,23 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
         Returns:
             Tuple of (should_end, reason)
         """
-        user_msgs = [m for m in self.conversation_history if m["role"] == "user"]
-        
         # Check if last message indicates ending
-        if user_msgs:
-            last_msg = user_msgs[-1]["content"].lower()
-            end_phrases = ["that's all", "nothing else", "i'm done", "that's it", "no more"]
-            if any(phrase in last_msg for phrase in end_phrases):
+        if self._last_user_message:
+            last_msg = self._last_user_message.lower()
+            if _END_PHRASE_PATTERN.search(last_msg):
                 return True, "User indicated completion"
         
         # Check if conversation is very long
-        if len(user_msgs) > 15:
+        if self._user_message_count > 15:
             return True, "Conversation length limit reached"
         
         return False, ""
     
     def reset(self) -> None:
         """Reset the conversation assistant for a new session."""
-        self.conversation_history = []
+        self._reset_history()
         self.state = ConversationState.IDLE
-        self.topics_discussed = set()
+        self.topics_discussed_bits = 0
         self.created_at = None
         self.ended_at = None
     
@@ -361,6 +414,6 @@ Keep responses brief, empathetic, and natural. Respond as a caring listener woul
             f"ConversationalAssistant("
             f"state={self.state.value}, "
             f"messages={len(self.conversation_history)}, "
-            f"topics={len(self.topics_discussed)})"
+            f"topics={bin(self.topics_discussed_bits).count('1')})"
         )
 
@@ -5,7 +5,75 @@ Parses and validates LLM output for dashboard display.
 Handles radar metrics, confidence, duration, staff behavior, and summary bullets.
 """
 
-from typing import Dict, List, Any
+import re
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Any
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    # numpy not installed - batch processing validates one response at a time
+    np = None
+
+try:
+    import msgspec  # type: ignore
+except ImportError:
+    # msgspec not installed - every response goes through per-field validation
+    msgspec = None
+
+
+# Numeric dashboard fields, in the column order used for batch validation
+SCORE_FIELDS = ("satisfaction_score", "duration_satisfaction", "staff_behavior")
+RADAR_KEYS = ("felt_heard", "concerns_addressed", "clear_communication", "respect_shown", "time_given")
+
+# Read-only neutral radar metrics, copied when the LLM output is unusable
+_DEFAULT_METRICS = MappingProxyType({key: 3 for key in RADAR_KEYS})
+
+_WS_RE = re.compile(r"\s+")
+
+
+if msgspec is not None:
+    from typing import Literal
+
+    try:
+        from typing import Annotated
+    except ImportError:  # Python < 3.9
+        from typing_extensions import Annotated  # type: ignore
+
+    Score = Annotated[int, msgspec.Meta(ge=1, le=5)]
+
+    class RadarMetrics(msgspec.Struct):
+        """Radar chart metrics in their already-valid form."""
+        felt_heard: Score = 3
+        concerns_addressed: Score = 3
+        clear_communication: Score = 3
+        respect_shown: Score = 3
+        time_given: Score = 3
+
+    class FeedbackSchema(msgspec.Struct):
+        """
+        Strict schema for well-formed LLM analyses.
+
+        A response that converts cleanly needs no clamping or coercion,
+        so it is validated in one C-level pass; anything else (out-of-range
+        or stringly-typed values, unexpected shapes) fails conversion and
+        takes the lenient per-field path instead.
+        """
+        satisfaction_score: Score = 3
+        radar_metrics: RadarMetrics = msgspec.field(default_factory=RadarMetrics)
+        confidence_in_treatment: Literal["yes", "no", "partial"] = "partial"
+        duration_satisfaction: Score = 3
+        staff_behavior: Score = 3
+        summary_bullets: List[str] = []
+
+
+def _as_float(value: Any) -> float:
+    """Convert an LLM-provided score to float, using NaN for unparseable values."""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return float("nan")
 
 
 class FeedbackAnalyzer:
@@ -35,9 +103,8 @@ class FeedbackAnalyzer:
         """Clean and normalize text fields."""
         if text is None:
             return ""
-        cleaned = str(text).strip()
-        cleaned = " ".join(cleaned.split())
-        return cleaned
+        # Collapse whitespace runs in one regex pass (skip str() for strings)
+        return _WS_RE.sub(" ", text if isinstance(text, str) else str(text)).strip()
     
     @staticmethod
     def validate_confidence(value: Any) -> str:
@@ -54,24 +121,11 @@ class FeedbackAnalyzer:
     @staticmethod
     def validate_radar_metrics(metrics: Any) -> Dict[str, int]:
         """Validate and normalize radar chart metrics."""
-        default_metrics = {
-            "felt_heard": 3,
-            "concerns_addressed": 3,
-            "clear_communication": 3,
-            "respect_shown": 3,
-            "time_given": 3
-        }
-        
         if not isinstance(metrics, dict):
-            return default_metrics
+            return dict(_DEFAULT_METRICS)
         
-        validated = {}
-        for key in default_metrics.keys():
-            validated[key] = FeedbackAnalyzer.validate_score(
-                metrics.get(key, 3)
-            )
-        
-        return validated
+        validate_score = FeedbackAnalyzer.validate_score
+        return {key: validate_score(metrics.get(key, 3)) for key in RADAR_KEYS}
     
     @staticmethod
     def validate_bullets(bullets: Any) -> List[str]:
@@ -106,6 +160,23 @@ class FeedbackAnalyzer:
         if not isinstance(llm_response, dict):
             llm_response = {}
         
+        # Fast path: well-formed responses validate against the strict schema at once
+        if msgspec is not None:
+            try:
+                parsed = msgspec.convert(llm_response, FeedbackSchema)
+            except msgspec.ValidationError:
+                parsed = None
+            
+            if parsed is not None:
+                return {
+                    "satisfaction_score": parsed.satisfaction_score,
+                    "radar_metrics": msgspec.structs.asdict(parsed.radar_metrics),
+                    "confidence_in_treatment": parsed.confidence_in_treatment,
+                    "duration_satisfaction": parsed.duration_satisfaction,
+                    "staff_behavior": parsed.staff_behavior,
+                    "summary_bullets": FeedbackAnalyzer.validate_bullets(parsed.summary_bullets)
+                }
+        
         # Core satisfaction score
         satisfaction_score = FeedbackAnalyzer.validate_score(
             llm_response.get("satisfaction_score", 3)
@@ -148,6 +219,63 @@ class FeedbackAnalyzer:
         
         return feedback
     
+    @staticmethod
+    def process_llm_output_batch(llm_responses: List[Dict]) -> List[Dict]:
+        """
+        Process and validate many LLM responses at once.
+        
+        All numeric fields (3 scores + 5 radar metrics per response) are
+        truncated, defaulted and clamped as one (N, 8) array. Results match
+        process_llm_output applied to each response.
+        
+        Args:
+            llm_responses: Raw dictionaries from the LLM
+            
+        Returns:
+            Validated feedback dictionaries, in input order
+        """
+        if np is None or not llm_responses:
+            return [FeedbackAnalyzer.process_llm_output(r) for r in llm_responses]
+        
+        responses = [r if isinstance(r, dict) else {} for r in llm_responses]
+        columns = len(SCORE_FIELDS) + len(RADAR_KEYS)
+        
+        def numeric_values(response: Dict) -> Iterator[float]:
+            radar = response.get("radar_metrics", {})
+            if not isinstance(radar, dict):
+                radar = {}
+            for field in SCORE_FIELDS:
+                yield _as_float(response.get(field, 3))
+            for key in RADAR_KEYS:
+                yield _as_float(radar.get(key, 3))
+        
+        raw = np.fromiter(
+            chain.from_iterable(map(numeric_values, responses)),
+            dtype=np.float64,
+            count=len(responses) * columns
+        ).reshape(len(responses), columns)
+        
+        # Truncate like int(float(x)); unparseable values become the middle score
+        scores = np.clip(np.nan_to_num(np.trunc(raw), nan=3.0), 1, 5).astype(np.int8)
+        
+        feedback_list = []
+        for response, row in zip(responses, scores.tolist()):
+            satisfaction_score, duration_satisfaction, staff_behavior = row[:len(SCORE_FIELDS)]
+            feedback_list.append({
+                "satisfaction_score": satisfaction_score,
+                "radar_metrics": dict(zip(RADAR_KEYS, row[len(SCORE_FIELDS):])),
+                "confidence_in_treatment": FeedbackAnalyzer.validate_confidence(
+                    response.get("confidence_in_treatment", "partial")
+                ),
+                "duration_satisfaction": duration_satisfaction,
+                "staff_behavior": staff_behavior,
+                "summary_bullets": FeedbackAnalyzer.validate_bullets(
+                    response.get("summary_bullets", [])
+                )
+            })
+        
+        return feedback_list
+    
     @staticmethod
     def format_feedback_display(feedback: Dict) -> str:
         """
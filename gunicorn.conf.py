@@ -0,0 +1,25 @@
+"""
+gunicorn.conf.py
+
+Production server configuration for the Flask app.
+Run with: gunicorn app:app
+
+Request handling is dominated by waiting on remote LLM APIs, so gevent
+workers are used: each worker serves many requests concurrently while
+they wait on the network. The gevent worker monkey-patches the standard
+library before the app is imported, so the LLM SDKs' HTTP clients yield
+to other requests instead of blocking the worker.
+"""
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:5000")
+worker_class = "gevent"
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+
+# Sessions are process-local unless REDIS_URL is set, so only scale out
+# to multiple workers when a shared session store is configured
+workers = int(os.getenv("WEB_CONCURRENCY", "4" if os.getenv("REDIS_URL") else "1"))
+
+# Analysis calls can take a while on slower models
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
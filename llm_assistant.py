@@ -4,12 +4,32 @@ llm_assistant.py
 Uses LLM to generate natural conversational responses from the assistant.
 """
 
+import asyncio
+import logging
 import os
-from typing import Optional
-from llm_client import LLMClient
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+from llm_client import AnthropicProvider, LLMClient, OpenAIProvider, keyword_matcher
 from conversational_assistant import ConversationalAssistant
 
 
+logger = logging.getLogger(__name__)
+
+# Worker threads for provider calls made from async code, sized independently
+# of the event loop's default executor. This is also the cap on run_many's
+# concurrency, since no more calls than this can run at once
+MAX_CONCURRENCY = 32
+_provider_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="llm-assistant")
+
+# Keyword categories for the offline mock responses
+_mock_categories = keyword_matcher({
+    "positive": ["good", "great", "excellent", "satisfied"],
+    "negative": ["bad", "poor", "terrible", "unhappy"],
+    "wait": ["wait", "long", "slow"],
+    "staff": ["staff", "doctor", "nurse"]
+})
+
+
 class LLMAssistant:
     """Generates natural conversational responses using LLM."""
     
@@ -17,6 +37,11 @@ class LLMAssistant:
         """Initialize the LLM assistant."""
         self.llm_client = LLMClient(provider=provider)
         self.conversation = ConversationalAssistant()
+        self._system_prompt = self.conversation.ASSISTANT_SYSTEM_PROMPT
+        
+        # Resolve the chat call once instead of probing the provider every turn
+        self._uses_llm = isinstance(self.llm_client.provider, (OpenAIProvider, AnthropicProvider))
+        self._chat_fn = self._llm_chat if self._uses_llm else self._mock_chat
     
     def generate_response(self, user_message: str) -> str:
         """
@@ -31,52 +56,13 @@ class LLMAssistant:
         # Add user message to conversation
         self.conversation.add_user_message(user_message)
         
-        # Build conversation context
-        context = self.conversation.get_conversation_context()
-        
         # Generate response using LLM
         try:
-            # Use a simple prompt for conversational response
-            user_prompt = f"""Previous conversation:
-{context}
-
-Continue the conversation naturally. Respond to the patient's last message as an empathetic healthcare feedback assistant. Keep your response brief (1-3 sentences), warm, and conversational. Do NOT summarize or score anything."""
-
-            # Get response from LLM
             # For conversational mode, we just want text, not JSON
-            # We'll use the provider's chat completion directly
             try:
-                if hasattr(self.llm_client.provider, 'client'):
-                    client = self.llm_client.provider.client
-                    if hasattr(client, 'chat') and hasattr(client.chat, 'completions'):
-                        # OpenAI style
-                        response = client.chat.completions.create(
-                            model="gpt-3.5-turbo",
-                            messages=[
-                                {"role": "system", "content": self.conversation.ASSISTANT_SYSTEM_PROMPT},
-                                {"role": "user", "content": user_prompt}
-                            ],
-                            temperature=0.7,
-                            max_tokens=150
-                        )
-                        assistant_response = response.choices[0].message.content.strip()
-                    elif hasattr(client, 'messages') and hasattr(client.messages, 'create'):
-                        # Anthropic style
-                        message = client.messages.create(
-                            model="claude-3-haiku-20240307",
-                            max_tokens=150,
-                            system=self.conversation.ASSISTANT_SYSTEM_PROMPT,
-                            messages=[{"role": "user", "content": user_prompt}]
-                        )
-                        assistant_response = message.content[0].text.strip()
-                    else:
-                        # Fallback to mock response
-                        assistant_response = self._generate_mock_response(user_message)
-                else:
-                    # Mock provider fallback
-                    assistant_response = self._generate_mock_response(user_message)
-            except Exception as e:
-                print(f"Error in LLM response generation: {e}")
+                assistant_response = self._chat_fn(user_message)
+            except Exception:
+                logger.exception("Error in LLM response generation")
                 assistant_response = self._generate_mock_response(user_message)
             
             # Add assistant response to conversation
@@ -84,24 +70,117 @@ Continue the conversation naturally. Respond to the patient's last message as an
             
             return assistant_response
             
-        except Exception as e:
-            print(f"Error generating response: {e}")
+        except Exception:
+            logger.exception("Error generating response")
             # Fallback response
             fallback = "I understand. Could you tell me a bit more about that?"
             self.conversation.add_assistant_message(fallback)
             return fallback
     
+    async def agenerate_response(self, user_message: str) -> str:
+        """
+        Generate a natural response without blocking the event loop.
+        
+        The provider call runs in a worker thread, so many conversations can
+        wait on the network concurrently (see run_many).
+        
+        Args:
+            user_message: The user's message
+            
+        Returns:
+            Assistant's response
+        """
+        self.conversation.add_user_message(user_message)
+        
+        try:
+            loop = asyncio.get_running_loop()
+            assistant_response = await loop.run_in_executor(
+                _provider_pool, self._chat_fn, user_message
+            )
+        except Exception:
+            logger.exception("Error in LLM response generation")
+            assistant_response = self._generate_mock_response(user_message)
+        
+        self.conversation.add_assistant_message(assistant_response)
+        return assistant_response
+    
+    @staticmethod
+    async def run_many(turns: Sequence[Tuple["LLMAssistant", str]], concurrency: int = 10) -> List[str]:
+        """
+        Generate responses for many conversations concurrently.
+        
+        Args:
+            turns: (assistant, user message) pairs, one per conversation
+            concurrency: Maximum number of in-flight provider calls (capped
+                at MAX_CONCURRENCY, the size of the provider thread pool)
+            
+        Returns:
+            Assistant responses, in input order
+        """
+        semaphore = asyncio.Semaphore(min(concurrency, MAX_CONCURRENCY))
+        
+        async def run_turn(assistant: "LLMAssistant", user_message: str) -> str:
+            async with semaphore:
+                return await assistant.agenerate_response(user_message)
+        
+        return list(await asyncio.gather(*(run_turn(a, m) for a, m in turns)))
+    
+    def generate_response_stream(self, user_message: str) -> Iterator[str]:
+        """
+        Generate a natural response, yielding text chunks as they arrive.
+        
+        The full response is recorded in the conversation once the stream
+        finishes, as with generate_response().
+        
+        Args:
+            user_message: The user's message
+            
+        Yields:
+            Chunks of the assistant's response
+        """
+        self.conversation.add_user_message(user_message)
+        
+        chunks = []
+        try:
+            if self._uses_llm:
+                for chunk in self.llm_client.stream_chat(
+                    self.conversation.get_messages(),
+                    self._system_prompt
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+            else:
+                # Mock provider fallback
+                chunks.append(self._generate_mock_response(user_message))
+                yield chunks[-1]
+        except Exception:
+            logger.exception("Error in LLM response generation")
+            if not chunks:
+                chunks.append(self._generate_mock_response(user_message))
+                yield chunks[-1]
+        
+        self.conversation.add_assistant_message("".join(chunks).strip())
+    
+    def _llm_chat(self, user_message: str) -> str:
+        """Get a conversational reply from the configured LLM provider."""
+        response = self.llm_client.chat(self.conversation.get_messages(), self._system_prompt)
+        return response.strip()
+    
+    def _mock_chat(self, user_message: str) -> str:
+        """Reply with a canned mock response (no API access)."""
+        return self._generate_mock_response(user_message)
+    
     def _generate_mock_response(self, user_message: str) -> str:
         """Generate a simple mock response for testing."""
-        message_lower = user_message.lower()
+        hits = _mock_categories(user_message)
         
-        if any(word in message_lower for word in ["good", "great", "excellent", "satisfied"]):
+        if "positive" in hits:
             return "That's wonderful to hear! Can you tell me more about what made it a positive experience?"
-        elif any(word in message_lower for word in ["bad", "poor", "terrible", "unhappy"]):
+        elif "negative" in hits:
             return "I'm sorry to hear that. Would you like to share more details about what happened?"
-        elif any(word in message_lower for word in ["wait", "long", "slow"]):
+        elif "wait" in hits:
             return "I understand that waiting can be frustrating. How long did you wait, and how did that affect your experience?"
-        elif any(word in message_lower for word in ["staff", "doctor", "nurse"]):
+        elif "staff" in hits:
             return "Thank you for sharing that. How did the staff make you feel during your visit?"
         else:
             return "Thank you for sharing. Is there anything else about your experience you'd like to tell me?"
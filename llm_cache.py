@@ -0,0 +1,359 @@
+"""
+llm_cache.py
+
+Response caching for LLM calls.
+Provides an exact-match response cache (optionally persisted to SQLite)
+and an embedding-keyed semantic cache, so repeated or paraphrased
+requests can be answered without a full LLM round-trip.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    # numpy not installed - semantic caching is disabled
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDING_DIM = 768
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".vitalsense", "cache", "analyze.sqlite")
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def _copy_value(value: Any) -> Any:
+    """Copy a cached value so callers can't mutate the stored entry (strings are shared)."""
+    return value if isinstance(value, str) else copy.deepcopy(value)
+
+
+def namespace_for(*parts: str) -> str:
+    """
+    Build a cache namespace from prompt text (or other invariants).
+
+    Any change to the inputs yields a new namespace, so stale entries
+    produced under an older prompt are never returned.
+
+    Args:
+        parts: Strings identifying the prompt/model configuration
+
+    Returns:
+        Hex sha256 digest of the joined parts
+    """
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def cache_key(*parts: str) -> str:
+    """
+    Build an exact-match cache key from request inputs.
+
+    Args:
+        parts: Strings identifying the request (provider, model, prompts, input)
+
+    Returns:
+        Hex blake2b digest (16 bytes) of the joined parts
+    """
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match LRU cache of LLM responses with a time-to-live.
+
+    Values are kept in memory as returned (e.g. parsed JSON dicts), so hits
+    skip both the LLM call and re-parsing. When a path is given, entries
+    are also written to a SQLite database so they are reused across
+    restarts and by other processes.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 7 * 24 * 3600, path: Optional[str] = None):
+        """
+        Initialize the response cache.
+
+        Args:
+            maxsize: Maximum number of responses kept in memory
+            ttl: Seconds before an entry expires
+            path: Optional SQLite file for persistent entries
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+        # key -> (value, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_db(path) if path else None
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached response.
+
+        Args:
+            key: Key from cache_key()
+
+        Returns:
+            Copy of the cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] >= now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return _copy_value(entry[0])
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, expires_at FROM llm_cache WHERE hash = ? AND expires_at > ?",
+                    (key, int(now))
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value, float(row[1]))
+                    self.stats["hits"] += 1
+                    return _copy_value(value)
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Cache a response.
+
+        Args:
+            key: Key from cache_key()
+            value: JSON-serializable response (string or parsed dict)
+        """
+        if not value:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._remember(key, _copy_value(value), now + self.ttl)
+
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO llm_cache (hash, response, created_at, expires_at) "
+                            "VALUES (?, ?, ?, ?)",
+                            (key, json.dumps(value), int(now), int(now + self.ttl))
+                        )
+                except sqlite3.Error as e:
+                    logger.warning("Could not persist cached response: %s", e)
+
+    def clear(self) -> None:
+        """Remove all cached entries (including persisted ones)."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM llm_cache")
+
+    def _remember(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert an entry into the in-memory LRU, evicting the oldest at capacity."""
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _open_db(path: str) -> Optional[sqlite3.Connection]:
+        """Open (and create if needed) the persistent cache database."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "hash TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created_at INTEGER NOT NULL, expires_at INTEGER NOT NULL)"
+            )
+            db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (int(time.time()),))
+            db.commit()
+            return db
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Could not open LLM cache at %s, caching in memory only: %s", path, e)
+            return None
+
+    def __len__(self) -> int:
+        """Return the number of in-memory entries."""
+        return len(self._entries)
+
+
+def embed(text: str, dim: int = EMBEDDING_DIM):
+    """
+    Embed text into a fixed-size, L2-normalized float32 vector.
+
+    Uses signed feature hashing over word unigrams and bigrams, which is
+    deterministic across processes and needs no model download.
+
+    Args:
+        text: Text to embed
+        dim: Embedding dimensionality
+
+    Returns:
+        numpy float32 array of shape (dim,), or None if numpy is unavailable
+    """
+    if np is None:
+        return None
+
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class SemanticCache:
+    """
+    LRU cache of LLM responses (strings or parsed dicts) keyed by embedding similarity.
+
+    Lookups compare the query embedding against all live entries of the
+    same namespace in one vectorized dot product, returning the stored
+    response when cosine similarity meets the threshold.
+    """
+
+    def __init__(self, maxsize: int = 1024, threshold: float = 0.92, ttl: float = 3600):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            maxsize: Maximum number of cached responses
+            threshold: Minimum cosine similarity for a hit
+            ttl: Seconds before an entry expires
+        """
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+        # key -> (namespace, embedding, response, expires_at)
+        self._entries: "OrderedDict[int, Tuple[str, object, Any, float]]" = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+        # Stacked embedding matrix, rebuilt lazily after writes
+        self._matrix = None
+        self._matrix_keys: List[int] = []
+        self._matrix_namespaces: List[str] = []
+
+    @property
+    def enabled(self) -> bool:
+        """Check if semantic caching is available (requires numpy)."""
+        return np is not None
+
+    def lookup(self, namespace: str, embedding) -> Optional[Any]:
+        """
+        Find a cached response similar to the given embedding.
+
+        Args:
+            namespace: Cache namespace (e.g. system prompt hash)
+            embedding: Normalized query embedding from embed()
+
+        Returns:
+            Copy of the cached response, or None on a miss
+        """
+        if embedding is None or not self.enabled:
+            return None
+
+        with self._lock:
+            self._rebuild_matrix()
+
+            if self._matrix is None:
+                self.stats["misses"] += 1
+                return None
+
+            sims = self._matrix @ embedding
+            mask = np.fromiter(
+                (ns == namespace for ns in self._matrix_namespaces),
+                dtype=bool,
+                count=len(self._matrix_namespaces)
+            )
+            sims[~mask] = -1.0
+
+            best = int(np.argmax(sims))
+            key = self._matrix_keys[best]
+            entry = self._entries.get(key)
+
+            if sims[best] < self.threshold or entry is None or entry[3] < time.time():
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return _copy_value(entry[2])
+
+    def store(self, namespace: str, embedding, response: Any) -> None:
+        """
+        Cache a response under the given embedding.
+
+        Args:
+            namespace: Cache namespace (e.g. system prompt hash)
+            embedding: Normalized embedding from embed()
+            response: LLM response (text or parsed dict) to cache
+        """
+        if embedding is None or not self.enabled or not response:
+            return
+
+        with self._lock:
+            self._entries[self._next_key] = (namespace, embedding, _copy_value(response), time.time() + self.ttl)
+            self._next_key += 1
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+            self._matrix = None
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _rebuild_matrix(self) -> None:
+        """Restack entry embeddings after writes, dropping expired entries."""
+        if self._matrix is not None:
+            return
+
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry[3] < now]
+        for key in expired:
+            del self._entries[key]
+
+        if not self._entries:
+            self._matrix_keys = []
+            self._matrix_namespaces = []
+            return
+
+        self._matrix_keys = list(self._entries.keys())
+        self._matrix_namespaces = [entry[0] for entry in self._entries.values()]
+        self._matrix = np.stack([entry[1] for entry in self._entries.values()])
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._entries)
@@ -7,12 +7,392 @@ Supports both real-time chat and structured analysis.
 """
 
 import json
+import logging
 import os
 import random
+import re
+import threading
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
 from abc import ABC, abstractmethod
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    # orjson not installed - fall back to the standard library json module
+    orjson = None
+
+from llm_cache import DEFAULT_CACHE_PATH, ResponseCache, SemanticCache, cache_key, embed, namespace_for
+from prompts import PROMPT_VERSION
+
+
+logger = logging.getLogger(__name__)
+
+
+if orjson is not None:
+    def _dumps_json(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+    
+    _loads_json = orjson.loads
+else:
+    _dumps_json = json.dumps
+    _loads_json = json.loads
+
+
+# Worker threads for speculative prefill requests, whose results are discarded
+_prefill_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm-prefill")
+
+
+# Shared HTTP client for all provider SDKs, so every LLMClient reuses the
+# same pool of keep-alive connections instead of paying a TLS handshake
+# per client instance
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """
+    Get the shared, connection-pooled HTTP client.
+    
+    Returns:
+        httpx.Client used by the OpenAI and Anthropic SDK clients,
+        or None to let the SDK create its own if httpx is unavailable
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                try:
+                    import httpx  # type: ignore
+                except ImportError:
+                    return None
+                # HTTP/2 multiplexes concurrent requests over one TLS connection
+                # per host; it needs the h2 package (pip install httpx[http2])
+                try:
+                    import h2  # type: ignore
+                    http2 = True
+                except ImportError:
+                    http2 = False
+                _http_client = httpx.Client(
+                    transport=httpx.HTTPTransport(
+                        http2=http2,
+                        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                        retries=3
+                    ),
+                    timeout=httpx.Timeout(60.0, connect=3.05)
+                )
+    return _http_client
+
+
+# Markdown code fence (```/```json, any case) wrapped around a JSON response
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z", re.IGNORECASE)
+
+_WORD_RE = re.compile(r"[a-z]+")
+_BYTES_WORD_RE = re.compile(rb"[a-z]+")
+_LOWER_TABLE = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+
+
+def tokenize(text: Union[str, bytes]) -> FrozenSet[str]:
+    """
+    Normalize text into the set of lowercase words it contains.
+    
+    Strings are casefolded; raw bytes are lowercased with an ASCII
+    translate table and scanned without decoding the whole message.
+    """
+    if isinstance(text, bytes):
+        return frozenset(word.decode("ascii") for word in _BYTES_WORD_RE.findall(text.translate(_LOWER_TABLE)))
+    return frozenset(_WORD_RE.findall(text.casefold()))
+
+
+def keyword_matcher(categories: Dict[str, Iterable[str]]) -> Callable[[str], FrozenSet[str]]:
+    """
+    Compile keyword lists into a whole-word category matcher.
+    
+    The text is lowercased and tokenized once, then each distinct word is a
+    single dict lookup. Matching is by whole word, so "goodbye" does not
+    count as "good".
+    
+    Args:
+        categories: Mapping of category label -> single-word keywords
+        
+    Returns:
+        Function mapping text (str or bytes) to the frozenset of matched categories
+    """
+    word_categories: Dict[str, FrozenSet[str]] = {}
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            word_categories[keyword] = word_categories.get(keyword, frozenset()) | {category}
+    
+    def match(text: Union[str, bytes]) -> FrozenSet[str]:
+        hits = frozenset()
+        for word in tokenize(text):
+            categories_for_word = word_categories.get(word)
+            if categories_for_word:
+                hits |= categories_for_word
+        return hits
+    
+    return match
+
+
+# Keyword categories driving the mock provider's canned responses
+_mock_analysis_categories = keyword_matcher({
+    # Whole-word matching, so inflected forms are listed explicitly
+    "negative": ["bad", "terrible", "long", "wait", "waits", "waiting", "waited",
+                 "delay", "delays", "delayed", "slow"],
+    "positive": ["good", "great", "excellent", "amazing"],
+    "rude": ["rude", "mean", "dismissive", "ignored"]
+})
+
+_mock_chat_categories = keyword_matcher({
+    "negative": ["bad", "terrible", "awful", "horrible", "worst"],
+    "wait": ["long", "slow", "wait", "waits", "waiting", "waited",
+             "delay", "delays", "delayed"],
+    "rude": ["rude", "mean", "dismissive", "ignored"],
+    "positive": ["good", "great", "excellent", "amazing", "wonderful"],
+    "friendly": ["nice", "friendly", "helpful", "kind", "caring"],
+    "doctor": ["doctor", "physician", "dr"],
+    "nurse": ["nurse", "nurses", "nursing"],
+    "appointment": ["appointment", "schedule", "booking"],
+    "facility": ["clean", "dirty", "facility", "room", "building"],
+    "off_topic": ["marketing", "sales", "weather", "sports", "politics"]
+})
+
+
+def prompt_cache_key(system_prompt: str) -> str:
+    """
+    Build an OpenAI prompt_cache_key for requests sharing a system prompt.
+    
+    Requests with the same key are routed to servers holding the prompt's
+    prefix cache; PROMPT_VERSION keeps invalidation explicit.
+    """
+    return f"vitalsense-{PROMPT_VERSION}-{cache_key(system_prompt)[:12]}"
+
+
+def anthropic_system(system_prompt: str) -> List[Dict]:
+    """Wrap a system prompt as an Anthropic content block marked for prompt caching."""
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def anthropic_messages(messages: List[Dict[str, str]]) -> List[Dict]:
+    """
+    Mark the end of a chat history as an Anthropic prompt-cache breakpoint.
+
+    The history is append-only, so the prefix cached on one turn is read
+    back on the next and only the newly appended messages are prefilled.
+    The input list is not modified.
+
+    Args:
+        messages: Message dictionaries [{'role': ..., 'content': ...}]
+
+    Returns:
+        Messages with the last one's content as a cache-marked text block
+    """
+    if not messages:
+        return messages
+    last = messages[-1]
+    return messages[:-1] + [{
+        "role": last["role"],
+        "content": [{"type": "text", "text": last["content"], "cache_control": {"type": "ephemeral"}}]
+    }]
+
+
+def _poll_with_backoff(is_done, initial: float = 5.0, maximum: float = 60.0) -> None:
+    """Call is_done() until it returns True, doubling the wait between polls."""
+    delay = initial
+    while not is_done():
+        time.sleep(delay)
+        delay = min(delay * 2, maximum)
+
+
+# Canned mock analyses, serialized once at import instead of on every call
+_MOCK_ANALYSIS_NEGATIVE = _dumps_json({
+    "satisfaction_score": 2,
+    "radar_metrics": {
+        "felt_heard": 2,
+        "concerns_addressed": 2,
+        "clear_communication": 3,
+        "respect_shown": 3,
+        "time_given": 1
+    },
+    "confidence_in_treatment": "partial",
+    "duration_satisfaction": 2,
+    "staff_behavior": 3,
+    "summary_bullets": [
+        "Patient experienced significant wait times",
+        "Consultation felt rushed due to delays",
+        "Concerns were partially addressed",
+        "Recommend reviewing scheduling processes"
+    ]
+})
+
+_MOCK_ANALYSIS_POSITIVE = _dumps_json({
+    "satisfaction_score": 5,
+    "radar_metrics": {
+        "felt_heard": 5,
+        "concerns_addressed": 5,
+        "clear_communication": 5,
+        "respect_shown": 5,
+        "time_given": 5
+    },
+    "confidence_in_treatment": "yes",
+    "duration_satisfaction": 5,
+    "staff_behavior": 5,
+    "summary_bullets": [
+        "Patient highly satisfied with overall care",
+        "Staff was attentive and professional",
+        "Clear communication throughout visit",
+        "Would recommend to others",
+        "No concerns or issues raised"
+    ]
+})
+
+_MOCK_ANALYSIS_RUDE = _dumps_json({
+    "satisfaction_score": 1,
+    "radar_metrics": {
+        "felt_heard": 1,
+        "concerns_addressed": 2,
+        "clear_communication": 2,
+        "respect_shown": 1,
+        "time_given": 2
+    },
+    "confidence_in_treatment": "no",
+    "duration_satisfaction": 2,
+    "staff_behavior": 1,
+    "summary_bullets": [
+        "Patient felt dismissed by staff",
+        "Communication was poor or unclear",
+        "Did not feel respected during visit",
+        "Urgent follow-up recommended",
+        "Consider staff training on patient interactions"
+    ]
+})
+
+_MOCK_ANALYSIS_NEUTRAL = _dumps_json({
+    "satisfaction_score": 3,
+    "radar_metrics": {
+        "felt_heard": 3,
+        "concerns_addressed": 3,
+        "clear_communication": 3,
+        "respect_shown": 4,
+        "time_given": 3
+    },
+    "confidence_in_treatment": "partial",
+    "duration_satisfaction": 3,
+    "staff_behavior": 4,
+    "summary_bullets": [
+        "Patient had a routine healthcare experience",
+        "No major concerns raised",
+        "Standard care was provided",
+        "Continue monitoring for patterns"
+    ]
+})
+
+
+# Simulated mock "thinking" delay; VS_MOCK_FAST=1 disables it for load tests
+_MOCK_THINK_SECONDS = 0.0 if os.getenv("VS_MOCK_FAST") else 0.3
+
+# Canned mock chat replies, built once at import
+_MOCK_GREETINGS = (
+    "Hello! I'm here to hear about your healthcare visit today. How was your overall experience?",
+    "Hi there! Thank you for taking the time to share your feedback. What brings you here today?",
+    "Welcome! I'd love to hear about your recent healthcare experience. What stood out to you?"
+)
+
+_MOCK_NEGATIVE_REPLIES = (
+    "I'm truly sorry to hear that. That sounds very difficult. Can you tell me more about what happened?",
+    "That's really concerning to hear. Your experience matters. What specifically went wrong?",
+    "I appreciate you sharing that, even though it was negative. What would have made it better?"
+)
+
+_MOCK_WAIT_REPLIES = (
+    "Wait times can be so frustrating. How long did you have to wait approximately?",
+    "I understand waiting is difficult. Did anyone communicate about the delay?",
+    "That's a common concern we hear. Was there anything available to make the wait more comfortable?"
+)
+
+_MOCK_RUDE_REPLIES = (
+    "I'm sorry you felt that way. No one should feel dismissed. Who was involved in that interaction?",
+    "That's not the experience we want anyone to have. Can you describe what happened?",
+    "Your feelings are valid. Would you like to share more details about that interaction?"
+)
+
+_MOCK_POSITIVE_REPLIES = (
+    "That's wonderful to hear! What made it such a positive experience?",
+    "I'm so glad! Was there a particular person or aspect that stood out?",
+    "That's great feedback! Would you recommend us to others? Why?"
+)
+
+_MOCK_FRIENDLY_REPLIES = (
+    "It's great that the staff made a positive impression! Anyone specific you'd like to mention?",
+    "We love hearing this! Friendly interactions make such a difference, don't they?",
+    "That's exactly what we aim for. Was the rest of your visit equally positive?"
+)
+
+_MOCK_DOCTOR_REPLIES = (
+    "How was your interaction with the doctor? Did they address all your concerns?",
+    "The doctor-patient relationship is so important. Did you feel heard?",
+    "Was the doctor able to explain things in a way you understood?"
+)
+
+_MOCK_NURSE_REPLIES = (
+    "Nurses play such a vital role. How was your experience with them?",
+    "Our nursing staff works hard. Did they make you feel comfortable?",
+    "Were the nurses attentive to your needs?"
+)
+
+_MOCK_APPOINTMENT_REPLIES = (
+    "How was the appointment scheduling process?",
+    "Was it easy to get an appointment at a time that worked for you?",
+    "Did the appointment start on time?"
+)
+
+_MOCK_FACILITY_REPLIES = (
+    "The environment matters. Was the facility up to your expectations?",
+    "Cleanliness is important to us. How did you find the facilities?",
+    "What did you think about the overall atmosphere of our facility?"
+)
+
+_MOCK_DEFAULTS_SECOND = (
+    "Thank you for sharing that. Is there anything specific about the staff you'd like to mention?",
+    "I appreciate that feedback. What about the facilities - how did you find them?",
+    "Got it. How was the communication throughout your visit?"
+)
+
+_MOCK_DEFAULTS_THIRD = (
+    "That's helpful to know. Were there any surprises during your visit, good or bad?",
+    "I see. If you could change one thing about your experience, what would it be?",
+    "Thank you. Is there anything else that stands out in your memory?"
+)
+
+_MOCK_DEFAULTS_FOURTH = (
+    "You've shared some valuable insights. Any final thoughts before we wrap up?",
+    "This is really helpful feedback. Anything else you'd like to add?",
+    "I appreciate all you've shared. Is there anything we haven't covered?"
+)
+
+_MOCK_DEFAULTS_LATER = (
+    "Thank you for continuing to share. What else would you like to mention?",
+    "I'm still listening. Feel free to share any other thoughts.",
+    "Is there anything else about your experience you'd like to discuss?",
+    "Your feedback is valuable. Please continue if there's more.",
+    "I appreciate your openness. What else comes to mind?"
+)
+
+# Default replies indexed by the number of user turns so far; turns 0-1 are
+# answered by a greeting and later turns fall back to _MOCK_DEFAULTS_LATER
+_DEFAULTS_BY_EXCHANGE = (
+    (),
+    (),
+    _MOCK_DEFAULTS_SECOND,
+    _MOCK_DEFAULTS_THIRD,
+    _MOCK_DEFAULTS_FOURTH
+)
+
+# Module-level PRNG with its choice method bound once
+_rng = random.Random()
+_choice = _rng.choice
+
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
@@ -36,6 +416,59 @@ class LLMProvider(ABC):
         """
         pass
 
+    def chat_completion_stream(self, messages: List[Dict[str, str]], system_prompt: str) -> Iterator[str]:
+        """
+        Generate a conversational response, yielding text as it is produced.
+        
+        Providers without native streaming yield the full response at once.
+        
+        Args:
+            messages: List of message dictionaries [{'role': 'user', 'content': ...}]
+            system_prompt: The system instruction for the persona
+            
+        Yields:
+            Chunks of the assistant's text response
+        """
+        yield self.chat_completion(messages, system_prompt)
+
+    def prefill(self, messages: List[Dict[str, str]], system_prompt: str) -> None:
+        """
+        Warm the provider's prompt cache for an upcoming chat request.
+        
+        Providers without prompt caching do nothing.
+        
+        Args:
+            messages: Conversation so far, optionally ending with a partial user message
+            system_prompt: The system instruction for the persona
+        """
+        pass
+
+    def analyze_conversation_batch(self, conversations: List[str], system_prompt: str,
+                                   max_concurrency: int = 10) -> List[str]:
+        """
+        Analyze several conversations, returning raw responses in input order.
+        
+        Providers without a batch API run the single-call path concurrently.
+        Failed items come back as empty strings.
+        
+        Args:
+            conversations: Conversation texts to analyze
+            system_prompt: The analysis system instruction
+            max_concurrency: Maximum number of in-flight requests
+            
+        Returns:
+            Raw response text per conversation
+        """
+        def analyze_one(conversation: str) -> str:
+            try:
+                return self.analyze_conversation(conversation, system_prompt)
+            except Exception:
+                logger.exception("Batch analysis item failed")
+                return ""
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(conversations)))) as pool:
+            return list(pool.map(analyze_one, conversations))
+
 
 class OpenAIProvider(LLMProvider):
     """OpenAI API implementation."""
@@ -43,28 +476,85 @@ class OpenAIProvider(LLMProvider):
     def __init__(self, api_key: Optional[str] = None):
         try:
             import openai 
-            self.client = openai.OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+            self.client = openai.OpenAI(
+                api_key=api_key or os.getenv("OPENAI_API_KEY"),
+                http_client=get_http_client()
+            )
             self.model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
         except ImportError:
             raise ImportError("openai package is required. Install with: pip install openai")
         except Exception as e:
             raise Exception(f"Failed to initialize OpenAI client: {e}")
     
+    def _analysis_body(self, conversation: str, system_prompt: str) -> Dict:
+        """Build the chat completion parameters for an analysis request."""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": conversation}
+            ],
+            "temperature": 0.0,
+            "response_format": {"type": "json_object"},
+            "prompt_cache_key": prompt_cache_key(system_prompt)
+        }
+    
     def analyze_conversation(self, conversation: str, system_prompt: str) -> str:
         try:
+            body = self._analysis_body(conversation, system_prompt)
+            # Sent via extra_body so older SDK versions accept the parameter
             response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": conversation}
-                ],
-                temperature=0.0,
-                response_format={"type": "json_object"}
+                extra_body={"prompt_cache_key": body.pop("prompt_cache_key")},
+                **body
             )
             return response.choices[0].message.content
         except Exception as e:
             raise Exception(f"OpenAI API analysis error: {e}")
 
+    def analyze_conversation_batch(self, conversations: List[str], system_prompt: str,
+                                   max_concurrency: int = 10) -> List[str]:
+        """Analyze conversations through the OpenAI Batch API (JSONL upload, poll, download)."""
+        try:
+            lines = [
+                json.dumps({
+                    "custom_id": str(i),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._analysis_body(conversation, system_prompt)
+                })
+                for i, conversation in enumerate(conversations)
+            ]
+            batch_file = self.client.files.create(
+                file=("analysis_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            
+            def is_done() -> bool:
+                nonlocal batch
+                batch = self.client.batches.retrieve(batch.id)
+                return batch.status in ("completed", "failed", "expired", "cancelled")
+            
+            _poll_with_backoff(is_done)
+            
+            results = [""] * len(conversations)
+            if batch.output_file_id:
+                output = self.client.files.content(batch.output_file_id).text
+                for line in output.splitlines():
+                    if not line.strip():
+                        continue
+                    item = json.loads(line)
+                    response = item.get("response") or {}
+                    if response.get("status_code") == 200:
+                        results[int(item["custom_id"])] = response["body"]["choices"][0]["message"]["content"]
+            return results
+        except Exception as e:
+            raise Exception(f"OpenAI API batch analysis error: {e}")
+
     def chat_completion(self, messages: List[Dict[str, str]], system_prompt: str) -> str:
         try:
             # Prepend system prompt to messages
@@ -74,11 +564,39 @@ class OpenAIProvider(LLMProvider):
                 model=self.model,
                 messages=full_messages,
                 temperature=0.7,  # Higher for more natural conversation
+                extra_body={"prompt_cache_key": prompt_cache_key(system_prompt)}
             )
             return response.choices[0].message.content
         except Exception as e:
             raise Exception(f"OpenAI API chat error: {e}")
 
+    def chat_completion_stream(self, messages: List[Dict[str, str]], system_prompt: str) -> Iterator[str]:
+        try:
+            full_messages = [{"role": "system", "content": system_prompt}] + messages
+            
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=full_messages,
+                temperature=0.7,
+                stream=True,
+                extra_body={"prompt_cache_key": prompt_cache_key(system_prompt)}
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"OpenAI API chat error: {e}")
+
+    def prefill(self, messages: List[Dict[str, str]], system_prompt: str) -> None:
+        # A one-token request with the same prefix and cache key populates
+        # OpenAI's automatic prefix cache for the real request that follows
+        self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "system", "content": system_prompt}] + messages,
+            max_tokens=1,
+            extra_body={"prompt_cache_key": prompt_cache_key(system_prompt)}
+        )
+
 
 class AnthropicProvider(LLMProvider):
     """Anthropic Claude API implementation."""
@@ -86,25 +604,56 @@ class AnthropicProvider(LLMProvider):
     def __init__(self, api_key: Optional[str] = None):
         try:
             import anthropic 
-            self.client = anthropic.Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+            self.client = anthropic.Anthropic(
+                api_key=api_key or os.getenv("ANTHROPIC_API_KEY"),
+                http_client=get_http_client()
+            )
             self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
         except ImportError:
             raise ImportError("anthropic package is required. Install with: pip install anthropic")
         except Exception as e:
             raise Exception(f"Failed to initialize Anthropic client: {e}")
     
+    def _analysis_params(self, conversation: str, system_prompt: str) -> Dict:
+        """Build the message parameters for an analysis request."""
+        return {
+            "model": self.model,
+            "max_tokens": 1024,
+            "system": anthropic_system(system_prompt),
+            "messages": [{"role": "user", "content": conversation}]
+        }
+    
     def analyze_conversation(self, conversation: str, system_prompt: str) -> str:
         try:
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=1024,
-                system=system_prompt,
-                messages=[{"role": "user", "content": conversation}]
-            )
+            message = self.client.messages.create(**self._analysis_params(conversation, system_prompt))
             return message.content[0].text
         except Exception as e:
             raise Exception(f"Anthropic API analysis error: {e}")
 
+    def analyze_conversation_batch(self, conversations: List[str], system_prompt: str,
+                                   max_concurrency: int = 10) -> List[str]:
+        """Analyze conversations through the Anthropic Message Batches API."""
+        try:
+            batch = self.client.messages.batches.create(requests=[
+                {"custom_id": str(i), "params": self._analysis_params(conversation, system_prompt)}
+                for i, conversation in enumerate(conversations)
+            ])
+            
+            def is_done() -> bool:
+                nonlocal batch
+                batch = self.client.messages.batches.retrieve(batch.id)
+                return batch.processing_status == "ended"
+            
+            _poll_with_backoff(is_done)
+            
+            results = [""] * len(conversations)
+            for item in self.client.messages.batches.results(batch.id):
+                if item.result.type == "succeeded":
+                    results[int(item.custom_id)] = item.result.message.content[0].text
+            return results
+        except Exception as e:
+            raise Exception(f"Anthropic API batch analysis error: {e}")
+
     def chat_completion(self, messages: List[Dict[str, str]], system_prompt: str) -> str:
         try:
             # Anthropic expects specific role alternation, ensuring we start with user if needed
@@ -113,239 +662,154 @@ class AnthropicProvider(LLMProvider):
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=1024,
-                system=system_prompt,
-                messages=messages
+                system=anthropic_system(system_prompt),
+                messages=anthropic_messages(messages)
             )
             return response.content[0].text
         except Exception as e:
             raise Exception(f"Anthropic API chat error: {e}")
 
+    def chat_completion_stream(self, messages: List[Dict[str, str]], system_prompt: str) -> Iterator[str]:
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=1024,
+                system=anthropic_system(system_prompt),
+                messages=anthropic_messages(messages)
+            ) as stream:
+                yield from stream.text_stream
+        except Exception as e:
+            raise Exception(f"Anthropic API chat error: {e}")
+
+    def prefill(self, messages: List[Dict[str, str]], system_prompt: str) -> None:
+        # Anthropic only reuses cache entries written at a breakpoint, so the
+        # breakpoint goes on the settled history rather than a partial user
+        # message the final request won't repeat
+        history = messages[:-1] if messages and messages[-1]["role"] == "user" else messages
+        if not history:
+            return
+        self.client.messages.create(
+            model=self.model,
+            max_tokens=1,
+            system=anthropic_system(system_prompt),
+            messages=anthropic_messages(history) + messages[len(history):]
+        )
+
 
 class MockProvider(LLMProvider):
     """Mock provider for testing without API access."""
     
     def analyze_conversation(self, conversation: str, system_prompt: str) -> str:
         """Mock analysis returning dashboard-ready data."""
-        conversation_lower = conversation.lower()
+        hits = _mock_analysis_categories(conversation)
         
         # Negative experience
-        if any(word in conversation_lower for word in ["bad", "terrible", "long", "wait"]):
-            return json.dumps({
-                "satisfaction_score": 2,
-                "radar_metrics": {
-                    "felt_heard": 2,
-                    "concerns_addressed": 2,
-                    "clear_communication": 3,
-                    "respect_shown": 3,
-                    "time_given": 1
-                },
-                "confidence_in_treatment": "partial",
-                "duration_satisfaction": 2,
-                "staff_behavior": 3,
-                "summary_bullets": [
-                    "Patient experienced significant wait times",
-                    "Consultation felt rushed due to delays",
-                    "Concerns were partially addressed",
-                    "Recommend reviewing scheduling processes"
-                ]
-            })
+        if "negative" in hits:
+            return _MOCK_ANALYSIS_NEGATIVE
         
         # Positive experience
-        elif any(word in conversation_lower for word in ["good", "great", "excellent", "amazing"]):
-            return json.dumps({
-                "satisfaction_score": 5,
-                "radar_metrics": {
-                    "felt_heard": 5,
-                    "concerns_addressed": 5,
-                    "clear_communication": 5,
-                    "respect_shown": 5,
-                    "time_given": 5
-                },
-                "confidence_in_treatment": "yes",
-                "duration_satisfaction": 5,
-                "staff_behavior": 5,
-                "summary_bullets": [
-                    "Patient highly satisfied with overall care",
-                    "Staff was attentive and professional",
-                    "Clear communication throughout visit",
-                    "Would recommend to others",
-                    "No concerns or issues raised"
-                ]
-            })
+        elif "positive" in hits:
+            return _MOCK_ANALYSIS_POSITIVE
         
         # Rude staff experience
-        elif any(word in conversation_lower for word in ["rude", "mean", "dismissive", "ignored"]):
-            return json.dumps({
-                "satisfaction_score": 1,
-                "radar_metrics": {
-                    "felt_heard": 1,
-                    "concerns_addressed": 2,
-                    "clear_communication": 2,
-                    "respect_shown": 1,
-                    "time_given": 2
-                },
-                "confidence_in_treatment": "no",
-                "duration_satisfaction": 2,
-                "staff_behavior": 1,
-                "summary_bullets": [
-                    "Patient felt dismissed by staff",
-                    "Communication was poor or unclear",
-                    "Did not feel respected during visit",
-                    "Urgent follow-up recommended",
-                    "Consider staff training on patient interactions"
-                ]
-            })
+        elif "rude" in hits:
+            return _MOCK_ANALYSIS_RUDE
         
         # Neutral experience
         else:
-            return json.dumps({
-                "satisfaction_score": 3,
-                "radar_metrics": {
-                    "felt_heard": 3,
-                    "concerns_addressed": 3,
-                    "clear_communication": 3,
-                    "respect_shown": 4,
-                    "time_given": 3
-                },
-                "confidence_in_treatment": "partial",
-                "duration_satisfaction": 3,
-                "staff_behavior": 4,
-                "summary_bullets": [
-                    "Patient had a routine healthcare experience",
-                    "No major concerns raised",
-                    "Standard care was provided",
-                    "Continue monitoring for patterns"
-                ]
-            })
+            return _MOCK_ANALYSIS_NEUTRAL
 
     def chat_completion(self, messages: List[Dict[str, str]], system_prompt: str) -> str:
         """Mock conversational responses with variety based on context."""
         
-        last_message = messages[-1]["content"].lower() if messages else ""
-        num_exchanges = len([m for m in messages if m.get("role") == "user"])
+        last_message = messages[-1]["content"] if messages else ""
+        num_exchanges = sum(1 for m in messages if m.get("role") == "user")
         
         # Simulate thinking time
-        time.sleep(0.3)
+        if _MOCK_THINK_SECONDS:
+            time.sleep(_MOCK_THINK_SECONDS)
         
         # First message / greeting
         if num_exchanges <= 1:
-            greetings = [
-                "Hello! I'm here to hear about your healthcare visit today. How was your overall experience?",
-                "Hi there! Thank you for taking the time to share your feedback. What brings you here today?",
-                "Welcome! I'd love to hear about your recent healthcare experience. What stood out to you?"
-            ]
-            return random.choice(greetings)
+            return _choice(_MOCK_GREETINGS)
+        
+        # One scan of the message classifies it into every matching category
+        hits = _mock_chat_categories(last_message)
         
         # Negative sentiment responses
-        if any(w in last_message for w in ["bad", "terrible", "awful", "horrible", "worst"]):
-            negatives = [
-                "I'm truly sorry to hear that. That sounds very difficult. Can you tell me more about what happened?",
-                "That's really concerning to hear. Your experience matters. What specifically went wrong?",
-                "I appreciate you sharing that, even though it was negative. What would have made it better?"
-            ]
-            return random.choice(negatives)
+        if "negative" in hits:
+            return _choice(_MOCK_NEGATIVE_REPLIES)
         
-        if any(w in last_message for w in ["long", "slow", "wait", "waiting", "delayed"]):
-            wait_responses = [
-                "Wait times can be so frustrating. How long did you have to wait approximately?",
-                "I understand waiting is difficult. Did anyone communicate about the delay?",
-                "That's a common concern we hear. Was there anything available to make the wait more comfortable?"
-            ]
-            return random.choice(wait_responses)
+        if "wait" in hits:
+            return _choice(_MOCK_WAIT_REPLIES)
         
-        if any(w in last_message for w in ["rude", "mean", "dismissive", "ignored"]):
-            rude_responses = [
-                "I'm sorry you felt that way. No one should feel dismissed. Who was involved in that interaction?",
-                "That's not the experience we want anyone to have. Can you describe what happened?",
-                "Your feelings are valid. Would you like to share more details about that interaction?"
-            ]
-            return random.choice(rude_responses)
+        if "rude" in hits:
+            return _choice(_MOCK_RUDE_REPLIES)
         
         # Positive sentiment responses
-        if any(w in last_message for w in ["good", "great", "excellent", "amazing", "wonderful"]):
-            positives = [
-                "That's wonderful to hear! What made it such a positive experience?",
-                "I'm so glad! Was there a particular person or aspect that stood out?",
-                "That's great feedback! Would you recommend us to others? Why?"
-            ]
-            return random.choice(positives)
+        if "positive" in hits:
+            return _choice(_MOCK_POSITIVE_REPLIES)
         
-        if any(w in last_message for w in ["nice", "friendly", "helpful", "kind", "caring"]):
-            friendly_responses = [
-                "It's great that the staff made a positive impression! Anyone specific you'd like to mention?",
-                "We love hearing this! Friendly interactions make such a difference, don't they?",
-                "That's exactly what we aim for. Was the rest of your visit equally positive?"
-            ]
-            return random.choice(friendly_responses)
+        if "friendly" in hits:
+            return _choice(_MOCK_FRIENDLY_REPLIES)
         
         # Topic-specific responses
-        if any(w in last_message for w in ["doctor", "physician", "dr"]):
-            return random.choice([
-                "How was your interaction with the doctor? Did they address all your concerns?",
-                "The doctor-patient relationship is so important. Did you feel heard?",
-                "Was the doctor able to explain things in a way you understood?"
-            ])
+        if "doctor" in hits:
+            return _choice(_MOCK_DOCTOR_REPLIES)
         
-        if any(w in last_message for w in ["nurse", "nurses", "nursing"]):
-            return random.choice([
-                "Nurses play such a vital role. How was your experience with them?",
-                "Our nursing staff works hard. Did they make you feel comfortable?",
-                "Were the nurses attentive to your needs?"
-            ])
+        if "nurse" in hits:
+            return _choice(_MOCK_NURSE_REPLIES)
         
-        if any(w in last_message for w in ["appointment", "schedule", "booking"]):
-            return random.choice([
-                "How was the appointment scheduling process?",
-                "Was it easy to get an appointment at a time that worked for you?",
-                "Did the appointment start on time?"
-            ])
+        if "appointment" in hits:
+            return _choice(_MOCK_APPOINTMENT_REPLIES)
         
-        if any(w in last_message for w in ["clean", "dirty", "facility", "room", "building"]):
-            return random.choice([
-                "The environment matters. Was the facility up to your expectations?",
-                "Cleanliness is important to us. How did you find the facilities?",
-                "What did you think about the overall atmosphere of our facility?"
-            ])
+        if "facility" in hits:
+            return _choice(_MOCK_FACILITY_REPLIES)
         
         # Off-topic redirect
-        if any(w in last_message for w in ["marketing", "sales", "weather", "sports", "politics"]):
+        if "off_topic" in hits:
             return "I appreciate the conversation! Though I'd love to hear more about your healthcare experience specifically. Anything else you'd like to share about your visit?"
         
         # Default varied responses based on conversation progress
-        if num_exchanges == 2:
-            defaults = [
-                "Thank you for sharing that. Is there anything specific about the staff you'd like to mention?",
-                "I appreciate that feedback. What about the facilities - how did you find them?",
-                "Got it. How was the communication throughout your visit?"
-            ]
-        elif num_exchanges == 3:
-            defaults = [
-                "That's helpful to know. Were there any surprises during your visit, good or bad?",
-                "I see. If you could change one thing about your experience, what would it be?",
-                "Thank you. Is there anything else that stands out in your memory?"
-            ]
-        elif num_exchanges == 4:
-            defaults = [
-                "You've shared some valuable insights. Any final thoughts before we wrap up?",
-                "This is really helpful feedback. Anything else you'd like to add?",
-                "I appreciate all you've shared. Is there anything we haven't covered?"
-            ]
-        else:
-            defaults = [
-                "Thank you for continuing to share. What else would you like to mention?",
-                "I'm still listening. Feel free to share any other thoughts.",
-                "Is there anything else about your experience you'd like to discuss?",
-                "Your feedback is valuable. Please continue if there's more.",
-                "I appreciate your openness. What else comes to mind?"
-            ]
-        
-        return random.choice(defaults)
+        if num_exchanges < len(_DEFAULTS_BY_EXCHANGE):
+            return _choice(_DEFAULTS_BY_EXCHANGE[num_exchanges] or _MOCK_DEFAULTS_LATER)
+        return _choice(_MOCK_DEFAULTS_LATER)
+
+    def chat_completion_stream(self, messages: List[Dict[str, str]], system_prompt: str) -> Iterator[str]:
+        """Mock streaming: yields the mock response word by word."""
+        response = self.chat_completion(messages, system_prompt)
+        words = response.split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
 
 
 class LLMClient:
-    """Main LLM client that wraps provider implementations."""
+    """
+    Main LLM client that wraps provider implementations.
     
-    def __init__(self, provider: str = "mock", api_key: Optional[str] = None):
+    Responses from real providers are cached by exact input, so repeated
+    analyses (re-runs, retries, demos) skip the LLM round-trip. A semantic
+    cache for analyses can be passed in explicitly, but is off by default:
+    its bag-of-words similarity can match transcripts that differ only in
+    sentiment, which would hand one patient's analysis to another.
+    """
+    
+    def __init__(self, provider: str = "mock", api_key: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None,
+                 semantic_cache: Optional[SemanticCache] = None):
+        """
+        Initialize the LLM client.
+        
+        Args:
+            provider: Provider name ('openai', 'anthropic' or 'mock')
+            api_key: Optional API key (defaults to the provider's env variable)
+            cache: Optional analysis cache; by default none is used unless
+                   ANALYZE_CACHE=1 (persisted to DEFAULT_CACHE_PATH). Chat
+                   replies are sampled to vary, so they are only cached when
+                   CHAT_CACHE=1 as well
+            semantic_cache: Optional similarity cache for analyses (opt-in;
+                            none is created by default)
+        """
         provider_lower = provider.lower()
         
         if provider_lower == "openai":
@@ -355,34 +819,182 @@ class LLMClient:
         elif provider_lower == "mock":
             self.provider = MockProvider()
         else:
-            print(f"Warning: Unknown provider '{provider}', falling back to Mock.")
+            logger.warning("Unknown provider %r, falling back to Mock.", provider)
             self.provider = MockProvider()
+            provider_lower = "mock"
+        
+        self.provider_name = provider_lower
+        self.model = getattr(self.provider, "model", provider_lower)
+        
+        # Exact caching is opt-in, and mock responses are free to regenerate
+        self.cache_analysis = cache is not None or os.getenv("ANALYZE_CACHE", "0") == "1"
+        self.cache_chat = os.getenv("CHAT_CACHE", "0") == "1"
+        if cache is None and provider_lower != "mock" and (self.cache_analysis or self.cache_chat):
+            cache = ResponseCache(path=DEFAULT_CACHE_PATH if self.cache_analysis else None)
+        self.cache = cache
+        
+        self.semantic_cache = semantic_cache if semantic_cache is not None and semantic_cache.enabled else None
+    
+    def _cache_key(self, kind: str, system_prompt: str, payload: str) -> str:
+        """Build the cache key for a request to this provider and model."""
+        return cache_key(kind, self.provider_name, self.model, PROMPT_VERSION, system_prompt, payload)
     
     def analyze_feedback(self, conversation: str, system_prompt: str) -> Dict:
         """Analyze healthcare feedback conversation and return structured data."""
+        key, embedding, namespace, cached = self._lookup_analysis(conversation, system_prompt)
+        if cached is not None:
+            return cached
+        
         try:
-            # Some providers might return code blocks, strip them
             raw_response = self.provider.analyze_conversation(conversation, system_prompt)
-            clean_response = raw_response.strip()
+        except Exception:
+            logger.exception("Analysis failed")
+            return {}
+        
+        return self._finish_analysis(raw_response, key, embedding, namespace)
+    
+    def analyze_feedback_batch(self, conversations: List[str], system_prompt: str) -> List[Dict]:
+        """
+        Analyze several feedback conversations in one provider batch.
+        
+        Cached conversations are answered immediately; the rest go through the
+        provider's batch API (or concurrent single calls as a fallback).
+        
+        Args:
+            conversations: Conversation texts to analyze
+            system_prompt: The analysis system instruction
+            
+        Returns:
+            Structured analysis per conversation, in input order
+        """
+        results: List[Optional[Dict]] = [None] * len(conversations)
+        pending = []
+        for i, conversation in enumerate(conversations):
+            key, embedding, namespace, cached = self._lookup_analysis(conversation, system_prompt)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, key, embedding, namespace))
+        
+        if pending:
+            to_analyze = [conversations[i] for i, _, _, _ in pending]
+            try:
+                if len(to_analyze) == 1:
+                    # A single miss isn't worth the batch API's queueing delay
+                    raw_responses = [self.provider.analyze_conversation(to_analyze[0], system_prompt)]
+                else:
+                    raw_responses = self.provider.analyze_conversation_batch(to_analyze, system_prompt)
+            except Exception:
+                logger.exception("Batch analysis failed")
+                raw_responses = [None] * len(pending)
             
-            if clean_response.startswith("```json"):
-                clean_response = clean_response[7:]
-            if clean_response.endswith("```"):
-                clean_response = clean_response[:-3]
-                
-            return json.loads(clean_response)
+            for (i, key, embedding, namespace), raw_response in zip(pending, raw_responses):
+                results[i] = self._finish_analysis(raw_response, key, embedding, namespace) if raw_response else {}
+        
+        return results
+    
+    def _lookup_analysis(self, conversation: str, system_prompt: str) -> Tuple:
+        """
+        Check the exact and semantic caches for an analysis.
+        
+        Returns:
+            Tuple of (cache key, embedding, semantic namespace, cached result or None)
+        """
+        key = embedding = namespace = None
+        if self.cache is not None and self.cache_analysis:
+            key = self._cache_key("analyze", system_prompt, conversation)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return key, None, None, cached
+        
+        # Near-duplicate conversations under the same provider/model/prompt reuse the stored analysis
+        if self.semantic_cache is not None:
+            embedding = embed(conversation)
+            namespace = namespace_for(self.provider_name, self.model, PROMPT_VERSION, system_prompt)
+            similar = self.semantic_cache.lookup(namespace, embedding)
+            if similar is not None:
+                return key, embedding, namespace, similar
+        
+        return key, embedding, namespace, None
+    
+    def _finish_analysis(self, raw_response: str, key: Optional[str], embedding, namespace: Optional[str]) -> Dict:
+        """Parse a raw analysis response and cache it if it parsed successfully."""
+        try:
+            # Some providers might return code blocks, strip them
+            clean_response = _FENCE_RE.sub("", raw_response)
+            result = _loads_json(clean_response)
         except json.JSONDecodeError:
             # Fallback for simple errors
-            print(f"Error parsing JSON from LLM: {raw_response[:100]}...")
+            logger.warning("Error parsing JSON from LLM: %s...", raw_response[:100])
             return {
                 "satisfaction_score": 3, 
                 "summary": "Analysis failed to parse.", 
                 "key_issues": ["Analysis Error"]
             }
-        except Exception as e:
-            print(f"Analysis failed: {e}")
+        except Exception:
+            logger.exception("Analysis failed")
             return {}
+        
+        # Only successfully parsed results are cached
+        if key is not None:
+            self.cache.set(key, result)
+        if embedding is not None:
+            self.semantic_cache.store(namespace, embedding, result)
+        return result
 
     def chat(self, messages: List[Dict[str, str]], system_prompt: str) -> str:
         """Get a conversational response."""
-        return self.provider.chat_completion(messages, system_prompt)
+        if self.cache is None or not self.cache_chat:
+            return self.provider.chat_completion(messages, system_prompt)
+        
+        key = self._cache_key("chat", system_prompt, json.dumps(messages, separators=(",", ":")))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        response = self.provider.chat_completion(messages, system_prompt)
+        self.cache.set(key, response)
+        return response
+
+    def stream_chat(self, messages: List[Dict[str, str]], system_prompt: str) -> Iterator[str]:
+        """Get a conversational response as a stream of text chunks."""
+        if self.cache is None or not self.cache_chat:
+            return self.provider.chat_completion_stream(messages, system_prompt)
+        return self._stream_chat_cached(messages, system_prompt)
+    
+    def prefill_async(self, messages: List[Dict[str, str]], system_prompt: str) -> Future:
+        """
+        Speculatively warm the provider's prompt cache in the background.
+        
+        Call this while the user is still speaking (e.g. with an interim
+        transcript) so the prefix of the real chat request is already
+        cached when it is sent. Failures are logged and otherwise ignored.
+        
+        Args:
+            messages: Conversation so far, optionally ending with a partial user message
+            system_prompt: The system instruction for the persona
+            
+        Returns:
+            Future that completes when the warm-up request finishes
+        """
+        def warm() -> None:
+            try:
+                self.provider.prefill(messages, system_prompt)
+            except Exception:
+                logger.debug("Speculative prefill failed", exc_info=True)
+        
+        return _prefill_pool.submit(warm)
+    
+    def _stream_chat_cached(self, messages: List[Dict[str, str]], system_prompt: str) -> Iterator[str]:
+        """Replay a cached reply as one chunk, or stream and cache the full reply."""
+        key = self._cache_key("chat", system_prompt, json.dumps(messages, separators=(",", ":")))
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        for chunk in self.provider.chat_completion_stream(messages, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.set(key, "".join(chunks))
@@ -9,6 +9,7 @@ Orchestrates the live conversation flow:
 import os
 import sys
 import time
+from typing import Optional
 
 # Load environment variables
 try:
@@ -21,13 +22,45 @@ from conversation import ConversationManager
 from prompts import get_system_prompt, get_user_message, CONVERSATIONAL_SYSTEM_PROMPT
 from llm_client import LLMClient
 from feedback_analyzer import FeedbackAnalyzer
-from storage import FeedbackStorage
+from storage import create_feedback_storage
 from speech_input import SpeechInput
 from speech_output import SpeechOutput
 
 
+def _enable_ansi() -> bool:
+    """Check that the console understands ANSI escapes, enabling them on Windows."""
+    if not sys.stdout.isatty():
+        return False
+    if os.name != 'nt':
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except Exception:
+        return False
+
+
+_ansi_supported: Optional[bool] = None
+
+
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """Clear the terminal with an ANSI escape instead of spawning cls/clear."""
+    global _ansi_supported
+    if _ansi_supported is None:
+        _ansi_supported = _enable_ansi()
+    
+    if _ansi_supported:
+        sys.stdout.write("\x1b[2J\x1b[H")
+        sys.stdout.flush()
+    elif os.name == 'nt' and sys.stdout.isatty():
+        # Legacy Windows console without VT support
+        os.system('cls')
 
 
 def main():
@@ -41,11 +74,11 @@ def main():
     
     # Initialize components
     conversation = ConversationManager()
-    storage = FeedbackStorage("feedback_data.csv")
+    storage = create_feedback_storage(os.getenv("FEEDBACK_STORE", "feedback_data.csv"))
     
-    # Voice components
-    speech_input = SpeechInput()
-    speech_output = SpeechOutput()
+    # Voice components are created once voice mode is chosen, so text-only
+    # sessions never load the speech engines
+    speech_output = None
     use_voice = False
     
     # Initialize LLM
@@ -77,9 +110,13 @@ def main():
             return
 
     # Check for voice preference
-    if speech_input.is_available() or speech_output.is_available():
+    if os.getenv("ENABLE_VOICE", "1") == "1" and (SpeechInput.probe() or SpeechOutput.probe()):
         v_resp = input("\nEnable voice mode? (y/n): ").strip().lower()
         use_voice = v_resp in ['y', 'yes']
+    
+    speech_input = SpeechInput(enable_voice=use_voice)
+    if use_voice:
+        speech_output = SpeechOutput()
 
     # 3. Conversation Loop
     print("\n[SESSION STARTED]")
@@ -95,8 +132,18 @@ def main():
 
     while True:
         try:
-            # A. Get User Input
-            user_text = speech_input.get_input("\nYou: ", use_voice=use_voice)
+            # A. Get User Input. Typed input overlaps with the reply still being
+            # spoken; before listening, let it finish so the mic doesn't hear it
+            if use_voice and speech_input.is_available():
+                speech_output.wait()
+            user_text = speech_input.get_input(
+                "\nYou: ",
+                use_voice=use_voice,
+                on_interim=lambda interim: llm_client.prefill_async(
+                    conversation.get_history() + [{"role": "user", "content": interim}],
+                    conversation.get_system_prompt(CONVERSATIONAL_SYSTEM_PROMPT)
+                )
+            )
             
             if not user_text:
                 continue
@@ -106,25 +153,33 @@ def main():
                 print("\n[Ending session...]")
                 break
             
-            conversational_history = conversation.get_history()
-            
-            # Optimization: If history is too long, we might truncate (future feature)
-            
+            # Condense older turns once the LLM context grows too long
+            conversation.compact(llm_client)
             conversation.add_user_message(user_text)
             
-            # B. Get Real-Time Assistant Response
-            print("Assistant: ...", end='\r') # Simple loading indicator
+            # B. Stream the Assistant Response as tokens arrive
+            sys.stdout.write("Assistant: ")
+            sys.stdout.flush()
             
-            assistant_response = llm_client.chat(
+            stream = llm_client.stream_chat(
                 conversation.get_history(),
-                CONVERSATIONAL_SYSTEM_PROMPT
+                conversation.get_system_prompt(CONVERSATIONAL_SYSTEM_PROMPT)
             )
+            if use_voice:
+                # Speak each sentence as soon as it completes
+                stream = speech_output.speak_stream(stream)
             
-            print(f"Assistant: {assistant_response}")
+            chunks = []
+            for delta in stream:
+                sys.stdout.write(delta)
+                chunks.append(delta)
+                # Flush every few deltas; the first one is shown immediately
+                if len(chunks) % 4 == 1:
+                    sys.stdout.flush()
+            print(flush=True)
+            
+            assistant_response = "".join(chunks).strip()
             
-            if use_voice:
-                speech_output.speak(assistant_response)
-                
             conversation.add_assistant_message(assistant_response)
             
         except KeyboardInterrupt:
@@ -162,8 +217,16 @@ def main():
         
         # Save
         print("\nSaving to database...")
-        if storage.save_feedback(feedback):
-            print("✓ Saved to feedback_data.csv")
+        saved = storage.save_feedback(feedback)
+        if saved:
+            # Saves may be written in the background; wait for the result
+            try:
+                storage.flush()
+            except Exception as e:
+                print(f"Error saving feedback: {e}")
+                saved = False
+        if saved:
+            print(f"✓ Saved to {storage.path}")
         else:
             print("X Error saving data")
             
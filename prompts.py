@@ -6,6 +6,9 @@ Ensures the LLM outputs valid structured JSON for healthcare feedback analysis
 and conducts natural, empathetic conversations.
 """
 
+# Bump whenever prompt semantics change, to invalidate cached LLM responses
+PROMPT_VERSION = "1"
+
 # System prompt for the real-time conversational assistant
 CONVERSATIONAL_SYSTEM_PROMPT = """You are a compassionate, attentive, and professional healthcare feedback assistant.
 Your goal is to collect feedback from a patient about their recent healthcare experience through a natural conversation.
@@ -28,6 +31,12 @@ IMPORTANT:
 *   NEVER break character. You are a helpful AI assistant gathering feedback.
 """
 
+# System prompt for condensing older conversation turns into a rolling summary
+SUMMARIZER_PROMPT = """You condense patient feedback conversations. Summarize the conversation excerpt you are given in a short paragraph (at most 120 words), written in the third person.
+
+Keep every concrete detail the patient shared: what happened, who was involved, wait times, feelings, complaints, and praise. If the excerpt begins with an earlier summary, merge it into your new summary. Do NOT add advice, scores, or anything the patient did not say.
+"""
+
 # System prompt that guides the LLM's behavior for ANALYSIS
 SYSTEM_PROMPT_BASE = """You are a healthcare feedback analysis expert. Your task is to analyze patient conversations and extract structured feedback for a clinical dashboard.
 
@@ -127,6 +136,12 @@ Expected Output:
 }
 """
 
+# Complete analysis system prompt, built once at import. Returning the same
+# string every call also keeps the provider-side prompt cache prefix stable.
+_CACHED_SYSTEM_PROMPT = f"""{SYSTEM_PROMPT_BASE}
+
+{FEW_SHOT_EXAMPLES}"""
+
 # Helper function to get the system prompt (includes few-shot examples)
 def get_system_prompt() -> str:
     """
@@ -135,9 +150,11 @@ def get_system_prompt() -> str:
     Returns:
         Complete system prompt string
     """
-    return f"""{SYSTEM_PROMPT_BASE}
+    return _CACHED_SYSTEM_PROMPT
 
-{FEW_SHOT_EXAMPLES}"""
+# Fixed text around the transcript in the analysis user message
+_ANALYZE_PREFIX = "Now analyze this conversation:\n\n"
+_ANALYZE_SUFFIX = "\n\nOutput the JSON response:"
 
 # Helper function to construct the user message with conversation
 def get_user_message(conversation: str) -> str:
@@ -150,8 +167,4 @@ def get_user_message(conversation: str) -> str:
     Returns:
         User message string for the LLM
     """
-    return f"""Now analyze this conversation:
-
-{conversation}
-
-Output the JSON response:"""
+    return _ANALYZE_PREFIX + conversation + _ANALYZE_SUFFIX
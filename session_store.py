@@ -0,0 +1,287 @@
+"""
+session_store.py
+
+Storage for active conversation sessions.
+Uses a process-local dictionary by default, or Redis when REDIS_URL is set
+so sessions are shared across server workers and survive restarts.
+"""
+
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from conversation import ConversationManager
+
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    # msgpack not installed - fall back to JSON serialization
+    msgpack = None
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    # orjson not installed - fall back to the standard library json module
+    orjson = None
+
+
+class InMemorySessionStore:
+    """
+    Stores sessions in a process-local dictionary (single worker only).
+
+    Sessions are kept in least-recently-used order, so abandoned sessions
+    (e.g. the user closed the tab) expire after ttl seconds of inactivity
+    and are swept from the front in O(expired) time. The oldest sessions
+    are also evicted once maxsize is exceeded.
+    """
+
+    def __init__(self, ttl: int = 3600, maxsize: int = 10000):
+        """
+        Initialize an empty session store.
+
+        Args:
+            ttl: Seconds of inactivity before a session expires
+            maxsize: Maximum number of sessions kept in memory
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # session_id -> (conversation, lock guarding its mutation, expires_at),
+        # ordered from least to most recently used
+        self._sessions: "OrderedDict[str, Tuple[ConversationManager, threading.Lock, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[ConversationManager]:
+        """
+        Get the conversation for a session, refreshing its expiry.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            ConversationManager instance, or None if the session doesn't exist
+        """
+        if not session_id:
+            return None
+
+        with self._lock:
+            self._sweep()
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._touch(session_id, entry)
+            return entry[0]
+
+    def set(self, session_id: str, conversation: ConversationManager) -> None:
+        """Store a new conversation under the given session id."""
+        with self._lock:
+            self._sweep()
+            self._touch(session_id, (conversation, threading.Lock(), 0.0))
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+
+    def lock(self, session_id: str) -> threading.Lock:
+        """Get the lock serializing updates to a session's conversation."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        return entry[1] if entry else threading.Lock()
+
+    def save(self, session_id: str, conversation: ConversationManager) -> None:
+        """Persist changes to a conversation (objects are shared in memory)."""
+        pass
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session if it exists."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _touch(self, session_id: str, entry: Tuple[ConversationManager, threading.Lock, float]) -> None:
+        """Mark a session as most recently used and extend its expiry."""
+        self._sessions[session_id] = (entry[0], entry[1], time.monotonic() + self.ttl)
+        self._sessions.move_to_end(session_id)
+
+    def _sweep(self) -> None:
+        """Drop expired sessions; they are always at the front of the order."""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if entry[2] > now:
+                break
+            del self._sessions[session_id]
+
+    def __contains__(self, session_id: str) -> bool:
+        entry = self._sessions.get(session_id)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class RedisSessionStore:
+    """
+    Stores sessions in Redis keyed by session id.
+
+    Conversations are serialized with msgpack, or JSON (via orjson when
+    installed) if msgpack is unavailable.
+    Saves use a WATCH/MULTI transaction: if another request updated the
+    session since it was loaded, messages appended by this request are
+    replayed on top of the stored history instead of overwriting it.
+    """
+
+    KEY_PREFIX = "vitalsense:session:"
+    LOCK_STRIPES = 64
+
+    def __init__(self, url: str, ttl: int = 3600, max_connections: int = 50):
+        """
+        Initialize the Redis session store.
+
+        Args:
+            url: Redis connection URL (e.g. redis://localhost:6379/0)
+            ttl: Seconds of inactivity before a session expires
+            max_connections: Size of the shared connection pool
+        """
+        try:
+            import redis  # type: ignore
+        except ImportError:
+            raise ImportError("redis package is required. Install with: pip install redis")
+
+        self._redis = redis
+        pool = redis.BlockingConnectionPool.from_url(url, max_connections=max_connections)
+        self._client = redis.Redis(connection_pool=pool)
+        self.ttl = ttl
+
+        # conversation -> (stored version, its appended_count at load time)
+        self._loaded = weakref.WeakKeyDictionary()
+
+        # Striped in-process locks; cross-process safety comes from WATCH/MULTI
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def get(self, session_id: str) -> Optional[ConversationManager]:
+        """
+        Load the conversation for a session.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            ConversationManager instance, or None if the session doesn't exist
+        """
+        if not session_id:
+            return None
+
+        raw = self._client.get(self._key(session_id))
+        if raw is None:
+            return None
+
+        payload = self._loads(raw)
+        conversation = ConversationManager.from_messages(payload["messages"], session_id=session_id)
+        conversation.is_active = payload.get("active", True)
+        self._track(conversation, payload["version"])
+        return conversation
+
+    def set(self, session_id: str, conversation: ConversationManager) -> None:
+        """Store a new conversation under the given session id."""
+        self._client.set(self._key(session_id), self._dumps(conversation, 0), ex=self.ttl)
+        self._track(conversation, 0)
+
+    def save(self, session_id: str, conversation: ConversationManager) -> None:
+        """
+        Persist changes to a conversation loaded with get().
+
+        Args:
+            session_id: Session identifier
+            conversation: The mutated conversation
+        """
+        key = self._key(session_id)
+        loaded_version, loaded_count = self._loaded.get(conversation, (None, 0))
+
+        with self._client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    if raw is None:
+                        # Session was ended/expired concurrently - don't resurrect it
+                        pipe.reset()
+                        return
+
+                    stored = self._loads(raw)
+                    if stored["version"] != loaded_version:
+                        # Concurrent update: replay only the messages we appended
+                        merged = stored["messages"] + self._new_messages(conversation, loaded_count)
+                        conversation = ConversationManager.from_messages(merged, session_id=session_id)
+
+                    version = stored["version"] + 1
+                    pipe.multi()
+                    pipe.set(key, self._dumps(conversation, version), ex=self.ttl)
+                    pipe.execute()
+                    self._track(conversation, version)
+                    return
+                except self._redis.WatchError:
+                    continue
+
+    def lock(self, session_id: str) -> threading.Lock:
+        """Get the in-process lock serializing updates to a session."""
+        return self._locks[hash(session_id) % self.LOCK_STRIPES]
+
+    def delete(self, session_id: str) -> None:
+        """Remove a session if it exists."""
+        if session_id:
+            self._client.delete(self._key(session_id))
+
+    def __contains__(self, session_id: str) -> bool:
+        return bool(self._client.exists(self._key(session_id)))
+
+    def _key(self, session_id: str) -> str:
+        return self.KEY_PREFIX + session_id
+
+    def _track(self, conversation: ConversationManager, version: int) -> None:
+        """Remember the stored version and message count of a loaded conversation."""
+        self._loaded[conversation] = (version, conversation.appended_count)
+
+    @staticmethod
+    def _new_messages(conversation: ConversationManager, loaded_count: int) -> List[Dict]:
+        """Get the messages appended to a conversation since it was loaded."""
+        new = conversation.appended_count - loaded_count
+        if new <= 0:
+            return []
+        # More than the buffer holds may have been appended; keep what is left
+        return list(conversation.messages)[-new:]
+
+    @staticmethod
+    def _dumps(conversation: ConversationManager, version: int) -> bytes:
+        payload = {
+            "version": version,
+            "active": conversation.is_active,
+            "messages": list(conversation.messages)
+        }
+        if msgpack is not None:
+            return msgpack.packb(payload)
+        if orjson is not None:
+            return orjson.dumps(payload)
+        return json.dumps(payload).encode("utf-8")
+
+    @staticmethod
+    def _loads(raw: bytes) -> Dict:
+        if msgpack is not None:
+            return msgpack.unpackb(raw)
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+
+
+def create_session_store():
+    """
+    Create the session store configured by the environment.
+
+    Returns:
+        RedisSessionStore if REDIS_URL is set, otherwise InMemorySessionStore
+    """
+    ttl = int(os.getenv("SESSION_TTL", "3600"))
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisSessionStore(redis_url, ttl=ttl)
+    return InMemorySessionStore(ttl=ttl, maxsize=int(os.getenv("MAX_SESSIONS", "10000")))
@@ -6,29 +6,50 @@ Converts speech to text using speech recognition.
 Gracefully falls back to text input if voice fails.
 """
 
+import importlib.util
 import sys
-from typing import Optional
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+
+# Longest utterance captured in one turn, in seconds
+PHRASE_TIME_LIMIT = 30
+
+# Seconds an interim transcript must stay unchanged before it is reported
+INTERIM_STABLE_SECONDS = 0.5
 
 
 class SpeechInput:
     """Handles speech-to-text conversion for user input."""
     
-    def __init__(self):
-        """Initialize speech recognition (if available)."""
+    def __init__(self, enable_voice: bool = True):
+        """
+        Initialize speech recognition (if available).
+        
+        Args:
+            enable_voice: If False, skip loading speech recognition and only
+                provide text input
+        """
         self.speech_available = False
         self.recognizer = None
         self.microphone = None
+        # Streaming Google Cloud recognizer, used when installed and configured
+        self._cloud_speech = None
+        self._speech_client = None
+        # Ambient noise calibration is deferred until voice input is first used
+        self._calibrated = False
+        
+        if not enable_voice:
+            return
         
         try:
             import speech_recognition as sr  # type: ignore
             self.recognizer = sr.Recognizer()
             self.microphone = sr.Microphone()
             
-            # Adjust for ambient noise
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            
             self.speech_available = True
+            self._speech_client = self._create_streaming_client()
         except ImportError:
             # speech_recognition not installed - that's okay, we'll use text
             self.speech_available = False
@@ -37,13 +58,17 @@ class SpeechInput:
             print(f"Speech recognition not available: {e}")
             self.speech_available = False
     
-    def get_input(self, prompt: str, use_voice: bool = False) -> str:
+    def get_input(self, prompt: str, use_voice: bool = False,
+                  on_interim: Optional[Callable[[str], None]] = None) -> str:
         """
         Get user input either via voice or text.
         
         Args:
             prompt: Prompt to display to the user
             use_voice: Whether to attempt voice input first
+            on_interim: Optional callback given the interim transcript once it
+                has been stable for a moment, while the user is still speaking
+                (streaming recognition only)
             
         Returns:
             User input as string
@@ -52,11 +77,21 @@ class SpeechInput:
         if use_voice and self.speech_available:
             try:
                 print(f"\n🎤 Listening... (speak your response)")
-                with self.microphone as source:
-                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=30)
+                if self._speech_client is not None:
+                    text = self._recognize_streaming(on_interim=on_interim)
+                else:
+                    with self.microphone as source:
+                        if not self._calibrated:
+                            # Adjust for ambient noise
+                            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                            self._calibrated = True
+                        audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=PHRASE_TIME_LIMIT)
+                    
+                    print("Processing audio...")
+                    text = self.recognizer.recognize_google(audio)
                 
-                print("Processing audio...")
-                text = self.recognizer.recognize_google(audio)
+                if not text:
+                    raise ValueError("no speech recognized")
                 print(f"You said: {text}\n")
                 return text
                 
@@ -74,6 +109,116 @@ class SpeechInput:
         except EOFError:
             return ""
     
+    @staticmethod
+    def probe() -> bool:
+        """
+        Check if speech recognition is installed, without importing it.
+        
+        Returns:
+            True if speech_recognition and PyAudio can be imported
+        """
+        return all(
+            importlib.util.find_spec(name) is not None
+            for name in ("speech_recognition", "pyaudio")
+        )
+    
+    def _create_streaming_client(self):
+        """
+        Create a Google Cloud Speech client for streaming recognition.
+        
+        Returns:
+            SpeechClient, or None if the library or credentials are unavailable
+        """
+        try:
+            from google.cloud import speech as cloud_speech  # type: ignore
+        except ImportError:
+            # google-cloud-speech not installed - use batch recognition instead
+            return None
+        try:
+            client = cloud_speech.SpeechClient()
+        except Exception as e:
+            print(f"Streaming speech recognition not available: {e}")
+            return None
+        self._cloud_speech = cloud_speech
+        return client
+    
+    def _recognize_streaming(self, on_interim: Optional[Callable[[str], None]] = None,
+                             language_code: str = "en-US") -> str:
+        """
+        Transcribe one utterance while it is being spoken.
+        
+        Microphone audio is sent in ~100ms frames and interim hypotheses are
+        shown as they arrive, so recognition finishes shortly after the user
+        stops talking instead of starting only then.
+        
+        Args:
+            on_interim: Optional callback, called at most once with the first
+                interim transcript that stays unchanged for INTERIM_STABLE_SECONDS
+            language_code: BCP-47 language of the speech
+            
+        Returns:
+            Final transcript, or an empty string if nothing was recognized
+        """
+        cloud_speech = self._cloud_speech
+        with self.microphone as source:
+            frames_per_chunk = source.SAMPLE_RATE // 10
+            streaming_config = cloud_speech.StreamingRecognitionConfig(
+                config=cloud_speech.RecognitionConfig(
+                    encoding=cloud_speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                    sample_rate_hertz=source.SAMPLE_RATE,
+                    language_code=language_code
+                ),
+                interim_results=True,
+                single_utterance=True
+            )
+            done = threading.Event()
+            # Latest interim transcript and when it first appeared. The API
+            # rarely resends an unchanged hypothesis, so stability is checked
+            # on every audio frame rather than when a response arrives
+            interim = ("", 0.0)
+            
+            def audio_requests() -> Iterator:
+                nonlocal on_interim
+                deadline = time.monotonic() + PHRASE_TIME_LIMIT
+                while not done.is_set() and time.monotonic() < deadline:
+                    chunk = source.stream.read(frames_per_chunk)
+                    text, since = interim
+                    if (on_interim is not None and text and not done.is_set()
+                            and time.monotonic() - since >= INTERIM_STABLE_SECONDS):
+                        callback, on_interim = on_interim, None
+                        callback(text)
+                    yield cloud_speech.StreamingRecognizeRequest(audio_content=chunk)
+            
+            transcript = ""
+            shown_interim = False
+            try:
+                responses = self._speech_client.streaming_recognize(
+                    config=streaming_config, requests=audio_requests()
+                )
+                for response in responses:
+                    for result in response.results:
+                        if not result.alternatives:
+                            continue
+                        hypothesis = result.alternatives[0].transcript.strip()
+                        if result.is_final:
+                            transcript = hypothesis
+                            done.set()
+                            break
+                        
+                        if hypothesis != transcript:
+                            transcript = hypothesis
+                            interim = (hypothesis, time.monotonic())
+                        print(f"\r... {transcript}", end="", flush=True)
+                        shown_interim = True
+                    if done.is_set():
+                        break
+            finally:
+                done.set()
+                if shown_interim:
+                    print()
+        
+        return transcript
+    
     def is_available(self) -> bool:
         """
         Check if speech input is available.
@@ -6,33 +6,100 @@ Uses text-to-speech to read questions aloud.
 Improves demo impact and accessibility.
 """
 
-from typing import Optional
+import importlib.util
+import queue
+import re
+import threading
+import time
+from typing import Iterable, Iterator, Optional
+
+
+# Sentence boundary inside streamed text; the final partial sentence is
+# flushed when the stream ends
+_SENTENCE_END_RE = re.compile(r"[.!?]\s")
 
 
 class SpeechOutput:
-    """Handles text-to-speech conversion for questions."""
+    """
+    Handles text-to-speech conversion for questions.
+    
+    A single background driver thread owns the pyttsx3 engine and speaks
+    queued utterances in order, so speak(async_mode=True) and speak_stream()
+    return without waiting and the engine is never touched from two
+    threads at once.
+    """
     
     def __init__(self):
         """Initialize text-to-speech (if available)."""
         self.tts_available = False
         self.engine = None
         
+        # Utterances waiting for the driver thread; None stops it
+        self._q: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        
         try:
             import pyttsx3  # type: ignore
+        except ImportError:
+            # pyttsx3 not installed - that's okay, we'll just print text
+            return
+        
+        ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._driver, args=(pyttsx3, ready), name="tts-driver", daemon=True
+        )
+        self._thread.start()
+        ready.wait()
+    
+    @staticmethod
+    def probe() -> bool:
+        """
+        Check if text-to-speech is installed, without importing it.
+        
+        Returns:
+            True if pyttsx3 can be imported
+        """
+        return importlib.util.find_spec("pyttsx3") is not None
+    
+    def _driver(self, pyttsx3, ready: threading.Event) -> None:
+        """Create the engine and speak queued utterances (driver thread)."""
+        try:
             self.engine = pyttsx3.init()
             
             # Set speech rate and volume (optional customization)
             self.engine.setProperty('rate', 150)  # Speed of speech
             self.engine.setProperty('volume', 0.9)  # Volume level (0.0 to 1.0)
             
+            # Non-blocking event loop, pumped below with iterate()
+            self.engine.startLoop(False)
             self.tts_available = True
-        except ImportError:
-            # pyttsx3 not installed - that's okay, we'll just print text
-            self.tts_available = False
         except Exception as e:
             # TTS initialization failed - fall back to text only
             print(f"Text-to-speech not available: {e}")
             self.tts_available = False
+        finally:
+            ready.set()
+        
+        if not self.tts_available:
+            return
+        
+        while True:
+            text = self._q.get()
+            try:
+                if text is None:
+                    self.engine.endLoop()
+                    return
+                
+                self.engine.say(text)
+                self.engine.iterate()
+                while self.engine.isBusy():
+                    self.engine.iterate()
+                    time.sleep(0.01)
+            except Exception:
+                # Silently skip the utterance - text display is still available
+                pass
+            finally:
+                self._q.task_done()
     
     def speak(self, text: str, async_mode: bool = False):
         """
@@ -40,24 +107,66 @@ class SpeechOutput:
         
         Args:
             text: Text to speak
-            async_mode: If True, speak asynchronously (non-blocking)
+            async_mode: If True, return as soon as the text is queued;
+                otherwise (default) wait until it has been spoken
         """
         if not self.tts_available:
             return
         
-        try:
-            if async_mode:
-                # Run in background (requires threading)
-                import threading
-                thread = threading.Thread(target=self.engine.say, args=(text,))
-                thread.daemon = True
-                thread.start()
-            else:
-                self.engine.say(text)
-                self.engine.runAndWait()
-        except Exception as e:
-            # Silently fail - text display is still available
-            pass
+        text = text.strip()
+        if text:
+            self._q.put(text)
+        if not async_mode:
+            self.wait()
+    
+    def speak_stream(self, text_iter: Iterable[str]) -> Iterator[str]:
+        """
+        Speak streamed text sentence by sentence while it is still arriving.
+        
+        Each completed sentence is queued as soon as it ends, so speech
+        starts with the first sentence instead of after the whole response.
+        Chunks are passed through unchanged so the caller can also display
+        them.
+        
+        Args:
+            text_iter: Iterable of text chunks (e.g. LLM token deltas)
+        
+        Yields:
+            The same text chunks, as they arrive
+        """
+        if not self.tts_available:
+            yield from text_iter
+            return
+        
+        buffer = ""
+        for chunk in text_iter:
+            yield chunk
+            # The buffer holds no sentence end yet, so only the new text (plus
+            # the previous last character, for a match spanning chunks) is scanned
+            scan = max(len(buffer) - 1, 0)
+            buffer += chunk
+            
+            # Queue every sentence completed so far, keep the partial tail
+            last_end = None
+            for last_end in _SENTENCE_END_RE.finditer(buffer, scan):
+                pass
+            if last_end is not None:
+                self.speak(buffer[:last_end.end()], async_mode=True)
+                buffer = buffer[last_end.end():]
+        
+        self.speak(buffer, async_mode=True)
+    
+    def wait(self) -> None:
+        """Block until every queued utterance has been spoken."""
+        if self.tts_available:
+            self._q.join()
+    
+    def close(self) -> None:
+        """Finish queued speech and stop the driver thread."""
+        if self.tts_available:
+            self._q.put(None)
+            self._thread.join()
+            self.tts_available = False
     
     def ask_question(self, question: str, use_voice: bool = True):
         """
@@ -82,4 +191,3 @@ class SpeechOutput:
             True if TTS is available, False otherwise
         """
         return self.tts_available
-
@@ -127,7 +127,7 @@ class ConversationalFeedbackApp {
         this.stopRecording();
 
         try {
-            const response = await fetch('/api/conversation/message', {
+            const response = await fetch('/api/conversation/stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -136,10 +136,15 @@ class ConversationalFeedbackApp {
                 })
             });
 
-            const data = await response.json();
+            const contentType = response.headers.get('Content-Type') || '';
+            const data = contentType.includes('text/event-stream')
+                ? await this.readStreamedReply(response)
+                : await response.json();
 
             if (data.success) {
-                this.addMessage('assistant', data.message);
+                if (!data.streamed) {
+                    this.addMessage('assistant', data.message);
+                }
                 this.speakMessage(data.message);
 
                 if (data.should_analyze || !data.is_active) {
@@ -158,6 +163,46 @@ class ConversationalFeedbackApp {
         }
     }
 
+    async readStreamedReply(response) {
+        // Render tokens into a single assistant bubble as server-sent events arrive
+        const contentDiv = this.addMessage('assistant', '');
+        const entry = this.messages[this.messages.length - 1];
+        const chatContainer = document.getElementById('chat-container');
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let result = { success: false, error: 'Stream ended unexpectedly' };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+
+            for (const event of events) {
+                if (!event.startsWith('data: ')) continue;
+                const payload = JSON.parse(event.slice(6));
+
+                if (payload.done) {
+                    result = payload;
+                } else {
+                    entry.content += payload.token;
+                    contentDiv.textContent = entry.content;
+                    chatContainer.scrollTop = chatContainer.scrollHeight;
+                }
+            }
+        }
+
+        if (result.success) {
+            entry.content = result.message;
+            contentDiv.textContent = result.message;
+        }
+        result.streamed = true;
+        return result;
+    }
+
     async endConversation() {
         if (!this.isActive) return;
 
@@ -445,6 +490,7 @@ class ConversationalFeedbackApp {
         chatContainer.appendChild(messageDiv);
 
         chatContainer.scrollTop = chatContainer.scrollHeight;
+        return contentDiv;
     }
 
     getConversationTranscript() {
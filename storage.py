@@ -1,19 +1,66 @@
 """
 storage.py
 
-Saves structured feedback into a CSV file.
+Saves structured feedback into a CSV file (default), a SQLite database,
+or a partitioned Parquet dataset.
 Appends new entries with timestamp.
-Handles file creation if CSV doesn't exist.
+Handles file creation if the file doesn't exist.
 """
 
+import atexit
 import csv
+import json
+import logging
 import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    # orjson not installed - fall back to the standard library json module
+    orjson = None
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:
+    # pyarrow not installed - Parquet storage falls back to CSV
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+PARQUET_EXTENSION = ".parquet"
+
+
+if orjson is not None:
+    def _dumps_json(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+    
+    _loads_json = orjson.loads
+else:
+    def _dumps_json(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+    
+    _loads_json = json.loads
 
 
 class FeedbackStorage:
-    """Handles storage of feedback data to CSV files."""
+    """
+    Handles storage of feedback data to CSV files.
+    
+    Saves are queued and written by a background thread that keeps the
+    file open, so callers don't wait on disk I/O. Loads wait for queued
+    saves first, so a save is always visible to the next load. Call
+    flush() to wait for queued saves and find out whether they succeeded.
+    """
     
     def __init__(self, csv_file: str = "feedback_data.csv"):
         """
@@ -23,67 +70,202 @@ class FeedbackStorage:
             csv_file: Path to the CSV file for storing feedback
         """
         self.csv_file = csv_file
+        self.path = csv_file
         self.fieldnames = ["timestamp", "satisfaction_score", "summary", "key_issues"]
+        # Whether the open file has its header; checked by the writer when it opens the file
+        self._header_written = False
+        # First write error since the last flush()/close(), raised from there
+        self._last_error: Optional[Exception] = None
+        # Rows waiting for the writer thread (started on the first save); None stops it
+        self._q: "queue.Queue[Optional[List[Dict]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Registered once; a no-op unless a writer thread is running at exit
+        atexit.register(self._close_at_exit)
     
-    def _ensure_file_exists(self):
-        """Create CSV file with headers if it doesn't exist."""
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-                writer.writeheader()
+    def __enter__(self) -> "FeedbackStorage":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """
+        Write any queued feedback, then stop the writer thread and close the file.
+        
+        Raises:
+            Exception: The first error hit while writing queued feedback
+        """
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._q.put(None)
+            writer.join()
+        self._raise_last_error()
+    
+    def flush(self) -> None:
+        """
+        Block until all queued feedback has been written.
+        
+        Raises:
+            Exception: The first error hit while writing queued feedback
+        """
+        self._wait_for_writes()
+        self._raise_last_error()
+    
+    def _wait_for_writes(self) -> None:
+        """Block until the writer thread has handled every queued save."""
+        if self._writer is not None:
+            self._q.join()
+    
+    def _raise_last_error(self) -> None:
+        """Raise (and clear) the first write error reported by the writer thread."""
+        error, self._last_error = self._last_error, None
+        if error is not None:
+            raise error
+    
+    def _close_at_exit(self) -> None:
+        """Flush queued feedback at interpreter exit, reporting rather than raising errors."""
+        try:
+            self.close()
+        except Exception:
+            logger.exception("Error saving feedback")
+    
+    def _to_row(self, feedback: Dict, timestamp: str) -> Dict:
+        """Flatten a feedback dictionary into a CSV row."""
+        return {
+            "timestamp": timestamp,
+            "satisfaction_score": feedback.get("satisfaction_score", 0),
+            "summary": feedback.get("summary", ""),
+            "key_issues": _dumps_json(list(feedback.get("key_issues", [])))
+        }
     
     def save_feedback(self, feedback: Dict) -> bool:
         """
-        Save feedback entry to CSV file.
+        Queue a feedback entry to be appended to the CSV file.
         
         Args:
             feedback: Feedback dictionary with satisfaction_score, summary, and key_issues
             
         Returns:
-            True if save was successful, False otherwise
+            True if the entry was queued, False otherwise
         """
-        try:
-            self._ensure_file_exists()
+        return self.save_many([feedback])
+    
+    def save_many(self, feedbacks: List[Dict]) -> bool:
+        """
+        Queue several feedback entries, written together with a single flush.
+        
+        Args:
+            feedbacks: Feedback dictionaries with satisfaction_score, summary, and key_issues
             
-            # Prepare row data
+        Returns:
+            True if the entries were queued, False otherwise
+        """
+        try:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            key_issues_str = "; ".join(feedback.get("key_issues", []))
+            rows = [self._to_row(feedback, timestamp) for feedback in feedbacks]
             
-            row = {
-                "timestamp": timestamp,
-                "satisfaction_score": feedback.get("satisfaction_score", 0),
-                "summary": feedback.get("summary", ""),
-                "key_issues": key_issues_str
-            }
-            
-            # Append to CSV
-            with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
-                writer.writerow(row)
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._writer_loop, name="feedback-writer", daemon=True
+                    )
+                    self._writer.start()
+                self._q.put(rows)
             
             return True
             
-        except Exception as e:
-            print(f"Error saving feedback: {e}")
+        except Exception:
+            logger.exception("Error saving feedback")
             return False
     
-    def load_all_feedback(self) -> List[Dict]:
+    def _writer_loop(self) -> None:
+        """Append queued rows to the CSV file (writer thread)."""
+        f = None
+        while True:
+            batch = [self._q.get()]
+            # Drain whatever else is already queued into the same write
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is None
+            
+            try:
+                if any(batch):
+                    f = self._write_batch(f, batch)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+            
+            if stopping:
+                if f is not None:
+                    f.close()
+                return
+    
+    def _write_batch(self, f, batch: List[Optional[List[Dict]]]):
+        """
+        Append a batch of queued rows (writer thread).
+        
+        Args:
+            f: The open CSV file, or None to open it
+            batch: Queued row lists (None entries are skipped)
+            
+        Returns:
+            The file to keep open for the next batch, or None after an error
+        """
+        try:
+            if f is not None and not os.path.exists(self.csv_file):
+                # File was deleted or rotated away - start a new one
+                f.close()
+                f = None
+            if f is None:
+                f = open(self.csv_file, 'a', newline='', encoding='utf-8')
+                self._header_written = f.tell() > 0
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+            if not self._header_written:
+                writer.writeheader()
+                self._header_written = True
+            for rows in batch:
+                if rows is not None:
+                    writer.writerows(rows)
+            f.flush()
+            return f
+        except Exception as e:
+            logger.exception("Error saving feedback to %s", self.csv_file)
+            if self._last_error is None:
+                self._last_error = e
+            # Reopen (and re-check the header) on the next batch
+            if f is not None:
+                try:
+                    f.close()
+                except Exception:
+                    pass
+            return None
+    
+    def load_all_feedback(self, limit: Optional[int] = None) -> List[Dict]:
         """
         Load all feedback entries from CSV.
         
+        Args:
+            limit: Optional maximum number of most recent entries to return
+            
         Returns:
-            List of feedback dictionaries
+            List of feedback dictionaries, oldest first
         """
         try:
+            self._wait_for_writes()
             if not os.path.exists(self.csv_file):
                 return []
             
-            feedback_list = []
+            # A bounded deque keeps only the most recent rows when limited
+            feedback_list = deque(maxlen=limit) if limit else []
             with open(self.csv_file, 'r', newline='', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
-                    # Parse key issues back to list
-                    key_issues = row["key_issues"].split("; ") if row["key_issues"] else []
+                    key_issues = self._parse_key_issues(row["key_issues"])
                     feedback_list.append({
                         "timestamp": row["timestamp"],
                         "satisfaction_score": int(row["satisfaction_score"]),
@@ -91,10 +273,279 @@ class FeedbackStorage:
                         "key_issues": key_issues
                     })
             
-            return feedback_list
+            return list(feedback_list)
             
+        except Exception:
+            logger.exception("Error loading feedback")
+            return []
+    
+    @staticmethod
+    def _parse_key_issues(value: str) -> List[str]:
+        """Parse key issues stored as a JSON list (or the older "; "-joined text)."""
+        if not value:
+            return []
+        if value.startswith("["):
+            try:
+                return _loads_json(value)
+            except ValueError:
+                pass
+        return value.split("; ")
+
+
+class SQLiteFeedbackStorage:
+    """
+    Handles storage of feedback data in a SQLite database.
+    
+    Entries are stored as JSON in a single table indexed by timestamp, so
+    loading the most recent feedback doesn't re-read the whole history.
+    One connection is opened (and the schema created) up front and shared
+    by every thread, serialized by a lock, so requests on short-lived
+    threads or greenlets don't each open their own.
+    """
+    
+    def __init__(self, db_file: str = "feedback_data.db"):
+        """
+        Initialize storage manager.
+        
+        Args:
+            db_file: Path to the SQLite database file
+        """
+        self.db_file = db_file
+        self.path = db_file
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        
+        try:
+            self._conn = self._open()
         except Exception as e:
-            print(f"Error loading feedback: {e}")
+            # Reported (and retried) by the first save or load
+            logger.warning("Could not open feedback database %s: %s", db_file, e)
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open the shared connection and create the schema if needed."""
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS feedback ("
+                "id INTEGER PRIMARY KEY, ts REAL NOT NULL, json TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedback_ts ON feedback (ts DESC)")
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        return conn
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get the shared connection (caller must hold self._lock)."""
+        if self._conn is None:
+            self._conn = self._open()
+        return self._conn
+    
+    def close(self) -> None:
+        """Close the shared connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def save_feedback(self, feedback: Dict) -> bool:
+        """
+        Save feedback entry to the database.
+        
+        Args:
+            feedback: Feedback dictionary with satisfaction_score, summary, and key_issues
+            
+        Returns:
+            True if save was successful, False otherwise
+        """
+        return self.save_many([feedback])
+    
+    def save_many(self, feedbacks: List[Dict]) -> bool:
+        """
+        Save several feedback entries in a single transaction.
+        
+        Args:
+            feedbacks: Feedback dictionaries with satisfaction_score, summary, and key_issues
+            
+        Returns:
+            True if save was successful, False otherwise
+        """
+        try:
+            now = time.time()
+            timestamp = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+            params = [
+                (now, _dumps_json({
+                    "timestamp": timestamp,
+                    "satisfaction_score": feedback.get("satisfaction_score", 0),
+                    "summary": feedback.get("summary", ""),
+                    "key_issues": list(feedback.get("key_issues", []))
+                }))
+                for feedback in feedbacks
+            ]
+            
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany("INSERT INTO feedback (ts, json) VALUES (?, ?)", params)
+            
+            return True
+            
+        except Exception:
+            logger.exception("Error saving feedback")
+            return False
+    
+    def flush(self) -> None:
+        """Saves are written synchronously, so there is nothing to wait for."""
+        pass
+    
+    def load_all_feedback(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Load feedback entries from the database.
+        
+        Args:
+            limit: Optional maximum number of most recent entries to return
+            
+        Returns:
+            List of feedback dictionaries, oldest first
+        """
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    "SELECT json FROM feedback ORDER BY ts DESC, id DESC LIMIT ?",
+                    (limit if limit else -1,)
+                ).fetchall()
+            return [_loads_json(row[0]) for row in reversed(rows)]
+            
+        except Exception:
+            logger.exception("Error loading feedback")
+            return []
+
+
+class ParquetFeedbackStorage:
+    """
+    Handles storage of feedback data in a Parquet dataset (requires pyarrow).
+    
+    Each save appends a new file under a date partition, so existing data
+    is never rewritten. Scores and key issues are stored with their native
+    int and list types and loaded with a columnar read.
+    """
+    
+    COLUMNS = ["timestamp", "satisfaction_score", "summary", "key_issues"]
+    
+    def __init__(self, root_path: str = "feedback_data.parquet"):
+        """
+        Initialize storage manager.
+        
+        Args:
+            root_path: Directory holding the Parquet dataset
+        """
+        self.root_path = root_path
+        self.path = root_path
+        self.schema = pa.schema([
+            ("timestamp", pa.string()),
+            ("ts", pa.float64()),
+            ("satisfaction_score", pa.int64()),
+            ("summary", pa.string()),
+            ("key_issues", pa.list_(pa.string())),
+            ("date", pa.string())
+        ])
+    
+    def save_feedback(self, feedback: Dict) -> bool:
+        """
+        Save feedback entry to the dataset.
+        
+        Args:
+            feedback: Feedback dictionary with satisfaction_score, summary, and key_issues
+            
+        Returns:
+            True if save was successful, False otherwise
+        """
+        return self.save_many([feedback])
+    
+    def save_many(self, feedbacks: List[Dict]) -> bool:
+        """
+        Save several feedback entries as one Parquet file.
+        
+        Args:
+            feedbacks: Feedback dictionaries with satisfaction_score, summary, and key_issues
+            
+        Returns:
+            True if save was successful, False otherwise
+        """
+        try:
+            now = time.time()
+            moment = datetime.fromtimestamp(now)
+            rows = [
+                {
+                    "timestamp": moment.strftime("%Y-%m-%d %H:%M:%S"),
+                    "ts": now,
+                    "satisfaction_score": int(feedback.get("satisfaction_score", 0)),
+                    "summary": feedback.get("summary", ""),
+                    "key_issues": list(feedback.get("key_issues", [])),
+                    "date": moment.strftime("%Y-%m-%d")
+                }
+                for feedback in feedbacks
+            ]
+            
+            table = pa.Table.from_pylist(rows, schema=self.schema)
+            pq.write_to_dataset(table, root_path=self.root_path, partition_cols=["date"])
+            
+            return True
+            
+        except Exception:
+            logger.exception("Error saving feedback")
+            return False
+    
+    def flush(self) -> None:
+        """Saves are written synchronously, so there is nothing to wait for."""
+        pass
+    
+    def load_all_feedback(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Load feedback entries from the dataset.
+        
+        Args:
+            limit: Optional maximum number of most recent entries to return
+            
+        Returns:
+            List of feedback dictionaries, oldest first
+        """
+        try:
+            if not os.path.exists(self.root_path):
+                return []
+            
+            table = pq.read_table(self.root_path, columns=self.COLUMNS + ["ts"]).sort_by("ts")
+            if limit:
+                table = table.slice(max(table.num_rows - limit, 0))
+            return table.select(self.COLUMNS).to_pylist()
+            
+        except Exception:
+            logger.exception("Error loading feedback")
             return []
 
 
+def create_feedback_storage(path: str = "feedback_data.csv"):
+    """
+    Create the feedback storage backend for a file path.
+    
+    Args:
+        path: Storage file; .db/.sqlite/.sqlite3 selects SQLite, .parquet a
+            Parquet dataset directory, anything else CSV
+        
+    Returns:
+        SQLiteFeedbackStorage, ParquetFeedbackStorage or FeedbackStorage instance
+    """
+    lowered = path.lower()
+    if lowered.endswith(SQLITE_EXTENSIONS):
+        return SQLiteFeedbackStorage(path)
+    if lowered.endswith(PARQUET_EXTENSION):
+        if pa is not None:
+            return ParquetFeedbackStorage(path)
+        csv_path = path[:-len(PARQUET_EXTENSION)] + ".csv"
+        logger.warning("pyarrow is not installed, storing feedback in %s instead", csv_path)
+        return FeedbackStorage(csv_path)
+    return FeedbackStorage(path)
+
+